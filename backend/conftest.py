@@ -1,92 +1,205 @@
 """
 Pytest configuration and fixtures for the Giterdone backend.
 """
+import json
+import logging
+from types import SimpleNamespace
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 
 User = get_user_model()
 
 
+@pytest.fixture(scope='session', autouse=True)
+def _fast_password_hasher():
+    """Use a cheap password hasher; hash strength is irrelevant in tests."""
+    with override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+    ):
+        yield
+
+
+@pytest.fixture(scope='session', autouse=True)
+def _silence_logging():
+    """
+    Drop log records during tests; 4xx responses otherwise format a
+    django.request warning for every negative-path assertion.
+    """
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    """Start each test with an empty cache, so throttle counts and cached payloads don't carry over."""
+    from django.core.cache import cache
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
-    """Return an API client for making requests."""
+    """Return an unauthenticated API client for making requests."""
     return APIClient()
 
 
 @pytest.fixture
-def password_user(db):
-    """Create a test user with password authentication."""
-    user = User.objects.create_user(
-        email='test@example.com',
-        password='TestPassword123!',
-        auth_method='password'
-    )
-    return user
+def json_post():
+    """
+    Return a helper that POSTs data as a JSON body.
+    Encodes with json.dumps directly instead of APIClient's renderer lookup.
+    """
+    def post(client, url, data):
+        return client.post(url, json.dumps(data), content_type='application/json')
+
+    return post
+
+
+# Field values for each kind of shared test user; see session_users
+USER_KINDS = {
+    'password': {
+        'email': 'password-user@example.com',
+        'password': 'TestPassword123!',
+        'auth_method': 'password',
+    },
+    'passkey': {
+        'email': 'passkey-user@example.com',
+        'password': None,
+        'auth_method': 'passkey',
+        'passkey_credential': {'id': 'test_credential_id'},
+    },
+    'totp': {
+        'email': 'totp-user@example.com',
+        'password': 'TestPassword123!',
+        'auth_method': 'password',
+        'totp_secret': 'JBSWY3DPEHPK3PXP',  # Test secret
+        'totp_enabled': True,
+    },
+}
+
+
+@pytest.fixture(scope='session')
+def session_users(django_db_setup, django_db_blocker):
+    """
+    Create one user of each kind once per test session, in a single INSERT.
+    Returns a mapping of kind to primary key; tests get fresh instances
+    through password_user, passkey_user and totp_user, and any changes they
+    make are rolled back with the test's transaction.
+    """
+    with django_db_blocker.unblock():
+        users = User.objects.bulk_create_users(USER_KINDS.values())
+    return {kind: user.pk for kind, user in zip(USER_KINDS, users)}
+
+
+@pytest.fixture
+def user_factory(db):
+    """
+    Return a function that creates a test user of the given kind on demand.
+    The kind's default email belongs to the session user, so pass another.
+    Each user is created with a single INSERT; the test transaction rolls it back.
+    """
+    def make(kind='password', **overrides):
+        fields = {**USER_KINDS[kind], **overrides}
+        return User.objects.create_user(**fields)
+
+    return make
 
 
 @pytest.fixture
-def passkey_user(db):
-    """Create a test user with passkey authentication."""
-    user = User.objects.create_user(
-        email='passkey@example.com',
-        password=None,
-        auth_method='passkey'
-    )
-    user.passkey_credential = {'id': 'test_credential_id'}
-    user.save()
-    return user
+def password_user(session_users, db):
+    """Return the shared test user with password authentication."""
+    return User.objects.get(pk=session_users['password'])
 
 
 @pytest.fixture
-def totp_user(db):
-    """Create a test user with TOTP 2FA enabled."""
-    user = User.objects.create_user(
-        email='totp@example.com',
-        password='TestPassword123!',
-        auth_method='password'
-    )
-    user.totp_secret = 'JBSWY3DPEHPK3PXP'  # Test secret
-    user.totp_enabled = True
-    user.save()
-    return user
+def passkey_user(session_users, db):
+    """Return the shared test user with passkey authentication."""
+    return User.objects.get(pk=session_users['passkey'])
 
 
 @pytest.fixture
-def auth_client(api_client, password_user):
-    """Return an authenticated API client."""
+def totp_user(session_users, db):
+    """Return the shared test user with TOTP 2FA enabled."""
+    return User.objects.get(pk=session_users['totp'])
+
+
+@pytest.fixture
+def other_user(user_factory):
+    """Create a second password user, distinct from password_user."""
+    return user_factory('password', email='other@example.com', password='Password123!')
+
+
+@pytest.fixture
+def bearer_header(password_user):
+    """Return request credentials carrying an access token for password_user."""
     refresh = RefreshToken.for_user(password_user)
-    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    return {'HTTP_AUTHORIZATION': f'Bearer {refresh.access_token}'}
+
+
+@pytest.fixture
+def auth_client(api_client, password_user, bearer_header):
+    """Return an authenticated API client."""
+    api_client.credentials(**bearer_header)
     api_client.user = password_user
     return api_client
 
 
+@pytest.fixture(scope='module')
+def other_user_todo(django_db_setup, django_db_blocker):
+    """
+    Create a todo owned by a second user once per test module.
+    Shared across tests, so it must not be modified or deleted.
+    """
+    from todos.models import Todo
+
+    with django_db_blocker.unblock():
+        owner = User.objects.create_user(
+            email='stranger@example.com',
+            password='Password123!',
+            auth_method='password'
+        )
+        todo = Todo.objects.create(user=owner, title='Other user todo')
+
+    yield todo
+
+    with django_db_blocker.unblock():
+        owner.delete()
+
+
 @pytest.fixture
 def user_with_todos(password_user, db):
-    """Create a user with some todos."""
+    """
+    Create a user with some todos.
+    Returns a namespace exposing the user and the high/low/done todos.
+    """
     from todos.models import Todo
 
-    Todo.objects.create(
-        user=password_user,
-        title='High priority task',
-        description='Important work',
-        priority=10,
-        completed=False
-    )
-    Todo.objects.create(
-        user=password_user,
-        title='Low priority task',
-        description='Less important',
-        priority=1,
-        completed=False
-    )
-    Todo.objects.create(
-        user=password_user,
-        title='Completed task',
-        description='Already done',
-        priority=5,
-        completed=True
-    )
-
-    return password_user
+    high, low, done = Todo.objects.bulk_create([
+        Todo(
+            user=password_user,
+            title='High priority task',
+            description='Important work',
+            priority=10,
+            completed=False
+        ),
+        Todo(
+            user=password_user,
+            title='Low priority task',
+            description='Less important',
+            priority=1,
+            completed=False
+        ),
+        Todo(
+            user=password_user,
+            title='Completed task',
+            description='Already done',
+            priority=5,
+            completed=True
+        ),
+    ])
+
+    return SimpleNamespace(user=password_user, high=high, low=low, done=done)
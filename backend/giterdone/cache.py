@@ -0,0 +1,12 @@
+"""
+Cache helpers shared by the project's apps.
+"""
+from django.core.cache import cache
+
+
+def redis_client():
+    """Return the raw Redis client behind the default cache, or None."""
+    client_factory = getattr(cache, '_cache', None)
+    if client_factory is not None and hasattr(client_factory, 'get_client'):
+        return client_factory.get_client(write=True)
+    return None
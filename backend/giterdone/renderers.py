@@ -0,0 +1,30 @@
+"""
+Response renderers shared by the project's APIs.
+"""
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_fallback_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Render JSON with orjson, which encodes UUIDs and datetimes natively.
+    Output matches DRF's JSONRenderer: compact, UTC datetimes with a 'Z' suffix.
+    Types orjson does not know (Decimal, lazy strings) go through DRF's encoder.
+    """
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        option = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC
+        renderer_context = renderer_context or {}
+        if renderer_context.get('indent') or 'indent' in (accepted_media_type or ''):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_fallback_encoder.default, option=option)
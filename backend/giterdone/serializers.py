@@ -0,0 +1,22 @@
+"""
+Serializer helpers shared by the project's apps.
+"""
+import copy
+
+
+class CachedFieldsMixin:
+    """
+    Build a ModelSerializer's fields once per class and hand each instance
+    shallow copies, skipping the model introspection in get_fields().
+    Only for serializers whose fields do not depend on the instance or context.
+    """
+
+    _fields_cache = {}
+
+    def get_fields(self):
+        cls = type(self)
+        cached = CachedFieldsMixin._fields_cache.get(cls)
+        if cached is None:
+            cached = super().get_fields()
+            CachedFieldsMixin._fields_cache[cls] = cached
+        return {name: copy.copy(field) for name, field in cached.items()}
@@ -91,7 +91,8 @@ WSGI_APPLICATION = 'giterdone.wsgi.application'
 
 # Use SQLite for testing, PostgreSQL for production
 import sys
-if 'pytest' in sys.modules:
+TESTING = 'pytest' in sys.modules
+if TESTING:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -107,10 +108,29 @@ else:
             'PASSWORD': os.getenv('DB_PASSWORD', 'giterdone_password'),
             'HOST': os.getenv('DB_HOST', 'localhost'),
             'PORT': os.getenv('DB_PORT', '5432'),
+            # Reuse connections across requests; verify them before reuse
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
+            # Bind parameters server-side so psycopg can prepare repeated
+            # queries on each persistent connection
+            'OPTIONS': {
+                'server_side_binding': True,
+            },
         }
     }
 
 
+# Password hashing
+# Argon2 (argon2-cffi) hashes new passwords; existing PBKDF2 hashes still
+# verify and are upgraded to Argon2 on the user's next login.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -170,6 +190,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
+# Per-user limits on todo writes (todos/ratelimit.py). Nginx has no
+# equivalent, so leave this on in production.
+RATELIMIT_ENABLE = os.getenv('RATELIMIT_ENABLE', 'True') == 'True'
+# Per-IP limits on the auth endpoints, keyed by each view's throttle_scope.
+# Set AUTH_THROTTLE_ENABLE=False when the reverse proxy enforces them instead
+# (see DEPLOYMENT.md) to skip the cache round trip on every such request.
+AUTH_THROTTLE_ENABLE = os.getenv('AUTH_THROTTLE_ENABLE', 'True') == 'True'
+# Reverse proxies in front of Django: 0 when clients connect directly, 1 behind
+# the Nginx in DEPLOYMENT.md. DRF's throttles only trust that many
+# X-Forwarded-For hops, so a client can't pick its own throttle key.
+NUM_PROXIES = int(os.getenv('NUM_PROXIES', '0'))
+AUTH_THROTTLE_RATES = {
+    'register': '10/h',
+    'password_login': '10/m',
+    'passkey_login_options': '10/m',
+    'passkey_login': '10/m',
+    'recovery': '5/h',
+}
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -178,8 +217,18 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'giterdone.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100,
+    'NUM_PROXIES': NUM_PROXIES,
+    # A rate of None turns a scope's throttle off
+    'DEFAULT_THROTTLE_RATES': {
+        scope: rate if AUTH_THROTTLE_ENABLE else None
+        for scope, rate in AUTH_THROTTLE_RATES.items()
+    },
 }
 
 # JWT Configuration
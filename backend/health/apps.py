@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HealthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'health'
+
+    def ready(self):
+        # Register the backend failure receiver used by the health check
+        from . import views  # noqa: F401
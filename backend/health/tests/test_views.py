@@ -0,0 +1,81 @@
+"""
+Tests for the health check views.
+"""
+import threading
+import time
+
+import pytest
+from django.urls import reverse
+from health import views
+
+
+@pytest.fixture(autouse=True)
+def _reset_health_state():
+    """Drop any cached health result so each test probes the backends."""
+    views._last_result.update(ts=0.0, payload=None, status=None)
+    views._last_failure.update(database=0.0, cache=0.0)
+
+
+@pytest.mark.django_db
+class TestHealthCheck:
+    """Test cases for the deep health check."""
+
+    def test_healthy(self, client):
+        """Test that healthy backends return 200."""
+        response = client.get(reverse('health-check'))
+
+        assert response.status_code == 200
+        assert response.json() == {
+            'status': 'healthy',
+            'services': {'database': 'healthy', 'cache': 'healthy'},
+        }
+
+    def test_unhealthy_cache(self, client, monkeypatch):
+        """Test that a failing backend returns 503 with its error."""
+        def fail():
+            raise ConnectionError('refused')
+        monkeypatch.setattr(views, '_ping_cache', fail)
+
+        response = client.get(reverse('health-check'))
+
+        assert response.status_code == 503
+        assert response.json()['status'] == 'unhealthy'
+        assert response.json()['services']['cache'] == 'unhealthy: refused'
+
+    def test_result_reused_within_ttl(self, client, monkeypatch):
+        """Test that a second probe within HEALTH_CHECK_TTL serves the cached result."""
+        url = reverse('health-check')
+        assert client.get(url).status_code == 200
+
+        monkeypatch.setattr(views, '_ping_cache', lambda: False)
+        assert client.get(url).status_code == 200
+
+        monkeypatch.setattr(views, 'HEALTH_CHECK_TTL', 0)
+        assert client.get(url).status_code == 503
+
+    def test_probe_timeout(self, client, monkeypatch):
+        """Test that a probe slower than HEALTH_CHECK_TIMEOUT reports unhealthy."""
+        def slow():
+            time.sleep(0.2)
+            return True
+        monkeypatch.setattr(views, '_ping_cache', slow)
+        monkeypatch.setattr(views, 'HEALTH_CHECK_TIMEOUT', 0.05)
+
+        response = client.get(reverse('health-check'))
+
+        assert response.status_code == 503
+        assert response.json()['services']['cache'] == 'unhealthy: timed out'
+
+    def test_database_checked_on_request_thread(self, client, monkeypatch):
+        """Test that the database probe reuses the worker thread's connection."""
+        threads = []
+        check = views._check_database
+
+        def record():
+            threads.append(threading.get_ident())
+            return check()
+        monkeypatch.setattr(views, '_check_database', record)
+
+        client.get(reverse('health-check'))
+
+        assert threads == [threading.get_ident()]
@@ -1,59 +1,150 @@
-from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import permissions, status
-from django.db import connection
-from django.core.cache import cache
+import asyncio
+import sys
+import threading
+import time
+
 import redis
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.signals import got_request_exception
+from django.db import DatabaseError, connection
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.views import View
+
+from giterdone.cache import redis_client
+
+# Seconds a deep check result is reused before probing the backends again
+HEALTH_CHECK_TTL = 5
+# Seconds to wait for the database and cache probes to complete
+HEALTH_CHECK_TIMEOUT = 1
+
+_lock = threading.Lock()
+_last_result = {'ts': 0.0, 'payload': None, 'status': None}
+# Monotonic time of the last backend error seen while serving any request
+_last_failure = {'database': 0.0, 'cache': 0.0}
+
+
+@receiver(got_request_exception)
+def record_backend_failure(sender, request=None, **kwargs):
+    """
+    Note database or cache errors raised by any view so the next health
+    check re-probes immediately instead of serving a cached healthy result.
+    """
+    exc = sys.exc_info()[1]
+    if isinstance(exc, DatabaseError):
+        backend = 'database'
+    elif isinstance(exc, redis.RedisError):
+        backend = 'cache'
+    else:
+        return
+    with _lock:
+        _last_failure[backend] = time.monotonic()
+
+
+def _ping_cache():
+    """
+    Check the cache backend with a single round trip.
+    Redis-backed caches are PINGed directly; other backends fall back to a set/get.
+    """
+    client = redis_client()
+    if client is not None:
+        return client.ping()
+
+    cache.set('health_check', 'ok', timeout=10)
+    return cache.get('health_check') == 'ok'
 
 
-class HealthCheckView(APIView):
+def _check_database():
+    """Return the database status, reusing the worker's persistent connection."""
+    try:
+        # Drop the connection if it is past CONN_MAX_AGE or fails the
+        # CONN_HEALTH_CHECKS probe, so a dead connection reports unhealthy.
+        connection.close_if_unusable_or_obsolete()
+        connection.close_if_health_check_failed()
+        connection.ensure_connection()
+        return 'healthy'
+    except Exception as e:
+        return f'unhealthy: {str(e)}'
+
+
+def _check_cache():
+    """Return the cache status."""
+    try:
+        if _ping_cache():
+            return 'healthy'
+        return 'unhealthy: unexpected value'
+    except Exception as e:
+        return f'unhealthy: {str(e)}'
+
+
+async def _probe(check, thread_sensitive=False):
+    """Run a blocking check off the event loop, bounded by HEALTH_CHECK_TIMEOUT."""
+    try:
+        return await asyncio.wait_for(
+            sync_to_async(check, thread_sensitive=thread_sensitive)(),
+            timeout=HEALTH_CHECK_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        return 'unhealthy: timed out'
+
+
+async def _run_checks():
+    """Probe the database and cache concurrently and build the health payload."""
+    # The database check runs on the worker's own thread so it reuses that
+    # thread's persistent connection; a throwaway executor thread would open
+    # a new one per probe. The Redis PING has no such state and runs alongside.
+    database, cache_status = await asyncio.gather(
+        _probe(_check_database, thread_sensitive=True),
+        _probe(_check_cache),
+    )
+    services = {'database': database, 'cache': cache_status}
+
+    overall_healthy = all(value == 'healthy' for value in services.values())
+    health_status = {
+        'status': 'healthy' if overall_healthy else 'unhealthy',
+        'services': services
+    }
+    return health_status, 200 if overall_healthy else 503
+
+
+class HealthCheckView(View):
     """
     Health check endpoint for monitoring service health.
     Returns 200 if all services are healthy, 503 otherwise.
+
+    Results are reused for HEALTH_CHECK_TTL seconds so bursts of probes
+    only hit the database and cache once per interval, unless a request
+    has failed with a database or cache error since the last probe. The
+    view is async, so under ASGI a slow probe does not hold a worker thread.
     """
-    permission_classes = [permissions.AllowAny]
-
-    def get(self, request):
-        health_status = {
-            'status': 'healthy',
-            'services': {}
-        }
-        overall_healthy = True
-
-        # Check database connection
-        try:
-            with connection.cursor() as cursor:
-                cursor.execute('SELECT 1')
-            health_status['services']['database'] = 'healthy'
-        except Exception as e:
-            health_status['services']['database'] = f'unhealthy: {str(e)}'
-            overall_healthy = False
-
-        # Check Redis/cache connection
-        try:
-            cache.set('health_check', 'ok', timeout=10)
-            cache_value = cache.get('health_check')
-            if cache_value == 'ok':
-                health_status['services']['cache'] = 'healthy'
-            else:
-                health_status['services']['cache'] = 'unhealthy: unexpected value'
-                overall_healthy = False
-        except Exception as e:
-            health_status['services']['cache'] = f'unhealthy: {str(e)}'
-            overall_healthy = False
-
-        if not overall_healthy:
-            health_status['status'] = 'unhealthy'
-            return Response(health_status, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-        return Response(health_status, status=status.HTTP_200_OK)
-
-
-class ReadinessCheckView(APIView):
+
+    async def get(self, request):
+        with _lock:
+            checked_at = _last_result['ts']
+            fresh = (
+                time.monotonic() - checked_at < HEALTH_CHECK_TTL
+                and max(_last_failure.values()) <= checked_at
+            )
+            payload = _last_result['payload']
+            response_status = _last_result['status']
+
+        if not fresh:
+            payload, response_status = await _run_checks()
+            with _lock:
+                _last_result.update(
+                    ts=time.monotonic(),
+                    payload=payload,
+                    status=response_status
+                )
+
+        return JsonResponse(payload, status=response_status)
+
+
+class ReadinessCheckView(View):
     """
     Readiness check endpoint - simpler check to see if service is ready to receive traffic.
     """
-    permission_classes = [permissions.AllowAny]
 
-    def get(self, request):
-        return Response({'status': 'ready'}, status=status.HTTP_200_OK)
+    async def get(self, request):
+        return JsonResponse({'status': 'ready'})
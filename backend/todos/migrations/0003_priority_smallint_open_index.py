@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='todo',
+            name='priority',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Higher number = higher priority'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', '-priority', '-created_at'], name='todo_open_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:23
+
+import todos.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0003_priority_smallint_open_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='todo',
+            name='id',
+            field=models.UUIDField(default=todos.models.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
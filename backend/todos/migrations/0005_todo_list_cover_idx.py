@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todos', '0004_todo_id_uuid7'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='todo',
+            name='todos_user_id_e737ed_idx',
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'completed', '-priority', '-created_at'], name='todo_list_cover_idx'),
+        ),
+    ]
@@ -1,8 +1,29 @@
+import secrets
+import time
 import uuid
 from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 
+# Completion marks used by __str__, indexed by the completed flag
+_COMPLETION_MARKS = ('○', '✓')
+
+
+def uuid7():
+    """
+    Return a time-ordered UUID (version 7, RFC 9562).
+    New primary keys sort after existing ones, keeping B-tree inserts local.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = secrets.randbits(74)
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76                      # version
+    value |= (rand >> 62) << 64             # rand_a (12 bits)
+    value |= 0b10 << 62                     # RFC 4122 variant
+    value |= rand & ((1 << 62) - 1)         # rand_b (62 bits)
+    return uuid.UUID(int=value)
+
 
 class Todo(models.Model):
     """
@@ -10,7 +31,7 @@ class Todo(models.Model):
     Each todo belongs to a specific user (private todos).
     """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -24,7 +45,7 @@ class Todo(models.Model):
 
     # Optional fields
     due_date = models.DateTimeField(blank=True, null=True)
-    priority = models.IntegerField(default=0, help_text='Higher number = higher priority')
+    priority = models.PositiveSmallIntegerField(default=0, help_text='Higher number = higher priority')
 
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
@@ -37,8 +58,18 @@ class Todo(models.Model):
         ordering = ['-priority', '-created_at']  # Sort by priority first, then date
         indexes = [
             models.Index(fields=['user', '-priority', '-created_at']),
-            models.Index(fields=['user', 'completed']),
+            # Covers filtering by completion status in list order
+            models.Index(
+                fields=['user', 'completed', '-priority', '-created_at'],
+                name='todo_list_cover_idx',
+            ),
+            # Open todos are the common read path; keep their index small
+            models.Index(
+                fields=['user', '-priority', '-created_at'],
+                name='todo_open_idx',
+                condition=Q(completed=False),
+            ),
         ]
 
     def __str__(self):
-        return f"{self.title} ({'✓' if self.completed else '○'})"
+        return f"{self.title} ({_COMPLETION_MARKS[self.completed]})"
@@ -0,0 +1,76 @@
+import functools
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django_ratelimit.core import is_ratelimited
+from rest_framework.exceptions import Throttled
+
+from giterdone.cache import redis_client
+
+# Trim the window, count it, and record this request in one atomic round trip.
+# KEYS[1] = window key; ARGV = now_ms, window_ms, limit, request id
+SLIDING_WINDOW_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1] - ARGV[2])
+local n = redis.call('ZCARD', KEYS[1])
+if n >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1] .. ':' .. ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+_script = None
+
+
+def _split_rate(rate):
+    """Turn a rate such as '100/h' into (limit, window in seconds)."""
+    count, period = rate.split('/')
+    return int(count), _PERIODS[period]
+
+
+def _allow(client, key, limit, window):
+    """Run the sliding-window script; True if the request fits in the window."""
+    global _script
+    if _script is None:
+        _script = client.register_script(SLIDING_WINDOW_LUA)
+    now_ms = int(time.time() * 1000)
+    args = [now_ms, window * 1000, limit, uuid.uuid4().hex]
+    return bool(_script(keys=[key], args=args, client=client))
+
+
+def sliding_window_ratelimit(group, rate, method):
+    """
+    Limit a view method to `rate` requests per user over a rolling window.
+
+    With Redis, each check is a single atomic Lua call on a sorted set, so the
+    count is shared by every worker. Other cache backends fall back to
+    django-ratelimit's fixed window. Either way, all of `method` share one
+    count. Requests over the limit get a 429. RATELIMIT_ENABLE=False, checked
+    on each request, turns the limit off on either backend.
+    """
+    methods = {method} if isinstance(method, str) else set(method)
+    limit, window = _split_rate(rate)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods and getattr(settings, 'RATELIMIT_ENABLE', True):
+                client = redis_client()
+                if client is not None:
+                    key = cache.make_key(f'rl:{request.user.pk}:{group}')
+                    limited = not _allow(client, key, limit, window)
+                else:
+                    limited = is_ratelimited(
+                        request, group=group, key='user', rate=rate,
+                        method=list(methods), increment=True
+                    )
+                if limited:
+                    raise Throttled()
+            return fn(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,8 +1,31 @@
+from django.utils import timezone
 from rest_framework import serializers
+from giterdone.serializers import CachedFieldsMixin
 from .models import Todo
 
 
-class TodoSerializer(serializers.ModelSerializer):
+def _datetime_representation(value):
+    """Format a datetime as DRF's DateTimeField does for ISO 8601 output."""
+    if not value:
+        return None
+    value = timezone.localtime(value).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+class _TitleValidationMixin:
+    """Shared title validation for serializers that write todos."""
+
+    def validate_title(self, value):
+        """Ensure title is not empty."""
+        title = (value or '').strip()
+        if not title:
+            raise serializers.ValidationError('Title cannot be empty.')
+        return title
+
+
+class TodoSerializer(CachedFieldsMixin, _TitleValidationMixin, serializers.ModelSerializer):
     """Serializer for Todo model."""
 
     class Meta:
@@ -19,30 +42,68 @@ class TodoSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
-    def validate_title(self, value):
-        """Ensure title is not empty."""
-        if not value or not value.strip():
-            raise serializers.ValidationError('Title cannot be empty.')
-        return value.strip()
+    @classmethod
+    def render_one(cls, instance):
+        """
+        Render a single todo with a shared serializer instance.
+        Safe because to_representation() does not touch serializer state.
+        Each class keeps its own instance, so subclasses never reuse a parent's.
+        """
+        shared = cls.__dict__.get('_shared')
+        if shared is None:
+            shared = cls._shared = cls()
+        return shared.to_representation(instance)
+
+    def to_representation(self, instance):
+        """
+        Render a todo directly instead of walking the generic field machinery.
+        Must produce exactly what the fields in Meta.fields would.
+        """
+        if not isinstance(instance, Todo):
+            return super().to_representation(instance)
+        return {
+            'id': str(instance.id),
+            'title': instance.title,
+            'description': instance.description,
+            'completed': instance.completed,
+            'priority': instance.priority,
+            'due_date': _datetime_representation(instance.due_date),
+            'created_at': _datetime_representation(instance.created_at),
+            'updated_at': _datetime_representation(instance.updated_at),
+        }
 
 
-class TodoCreateSerializer(serializers.ModelSerializer):
-    """Serializer for creating a new Todo."""
+class TodoListSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer describing the rows of the todo list.
+    The list view fetches exactly Meta.fields with .values() and renders the
+    dicts directly, so these fields define the list payload.
+    """
 
     class Meta:
         model = Todo
         fields = [
+            'id',
             'title',
             'description',
+            'completed',
             'priority',
-            'due_date'
+            'due_date',
+            'created_at',
+            'updated_at'
         ]
+        read_only_fields = fields
 
-    def validate_title(self, value):
-        """Ensure title is not empty."""
-        if not value or not value.strip():
-            raise serializers.ValidationError('Title cannot be empty.')
-        return value.strip()
+
+class TodoCreateSerializer(TodoSerializer):
+    """
+    Serializer for creating a new Todo.
+    Accepts title, description, priority and due_date, and renders the full
+    todo so the view can respond with the same serializer.
+    """
+
+    class Meta(TodoSerializer.Meta):
+        read_only_fields = TodoSerializer.Meta.read_only_fields + ['completed']
 
     def create(self, validated_data):
         """Create a todo associated with the current user."""
@@ -50,21 +111,8 @@ class TodoCreateSerializer(serializers.ModelSerializer):
         return Todo.objects.create(user=user, **validated_data)
 
 
-class TodoUpdateSerializer(serializers.ModelSerializer):
-    """Serializer for updating an existing Todo."""
-
-    class Meta:
-        model = Todo
-        fields = [
-            'title',
-            'description',
-            'completed',
-            'priority',
-            'due_date'
-        ]
-
-    def validate_title(self, value):
-        """Ensure title is not empty."""
-        if not value or not value.strip():
-            raise serializers.ValidationError('Title cannot be empty.')
-        return value.strip()
+class TodoUpdateSerializer(TodoSerializer):
+    """
+    Serializer for updating an existing Todo.
+    Renders the full todo so the view can respond with the same serializer.
+    """
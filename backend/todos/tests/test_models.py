@@ -1,6 +1,8 @@
 """
 Tests for Todo model.
 """
+from types import SimpleNamespace
+
 import pytest
 from django.contrib.auth import get_user_model
 from todos.models import Todo
@@ -8,7 +10,30 @@ from todos.models import Todo
 User = get_user_model()
 
 
-@pytest.mark.django_db
+@pytest.fixture(scope='class')
+def shared_todos(django_db_setup, django_db_blocker):
+    """
+    Create a user with an open and a completed todo once per test class.
+    Only for read-only assertions; tests must not mutate these instances.
+    """
+    with django_db_blocker.unblock():
+        user = User.objects.create_user(
+            email='shared@example.com',
+            password='TestPassword123!',
+            auth_method='password'
+        )
+        todos = SimpleNamespace(
+            open=Todo.objects.create(user=user, title='Test Todo'),
+            done=Todo.objects.create(user=user, title='Test Todo', completed=True),
+        )
+
+    yield todos
+
+    with django_db_blocker.unblock():
+        user.delete()
+
+
+@pytest.mark.django_db(transaction=False)
 class TestTodoModel:
     """Test cases for the Todo model."""
 
@@ -28,32 +53,28 @@ class TestTodoModel:
         assert todo.user == password_user
         assert todo.id is not None
 
-    def test_todo_default_values(self, password_user):
-        """Test default values for todo fields."""
+    def test_todo_id_is_uuid7(self, password_user):
+        """Test that todo ids are time-ordered version 7 UUIDs."""
         todo = Todo.objects.create(
             user=password_user,
             title='Test Todo'
         )
 
+        assert todo.id.version == 7
+
+    def test_todo_default_values(self, shared_todos):
+        """Test default values for todo fields."""
+        todo = shared_todos.open
+
         assert todo.description == ''
         assert not todo.completed
         assert todo.priority == 0
         assert todo.due_date is None
 
-    def test_todo_str_representation(self, password_user):
+    def test_todo_str_representation(self, shared_todos):
         """Test the string representation of a todo."""
-        todo = Todo.objects.create(
-            user=password_user,
-            title='Test Todo',
-            completed=False
-        )
-
-        assert str(todo) == 'Test Todo (○)'
-
-        todo.completed = True
-        todo.save()
-
-        assert str(todo) == 'Test Todo (✓)'
+        assert str(shared_todos.open) == 'Test Todo (○)'
+        assert str(shared_todos.done) == 'Test Todo (✓)'
 
     def test_todo_ordering(self, password_user):
         """Test that todos are ordered by priority then created_at."""
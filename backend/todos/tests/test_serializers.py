@@ -3,7 +3,12 @@ Tests for todo serializers.
 """
 import pytest
 from django.contrib.auth import get_user_model
-from todos.serializers import TodoSerializer, TodoCreateSerializer, TodoUpdateSerializer
+from todos.serializers import (
+    TodoSerializer,
+    TodoListSerializer,
+    TodoCreateSerializer,
+    TodoUpdateSerializer,
+)
 from todos.models import Todo
 
 User = get_user_model()
@@ -30,6 +35,73 @@ class TestTodoSerializer:
         assert 'id' in serializer.data
         assert 'created_at' in serializer.data
 
+    def test_representation_matches_fields(self, password_user):
+        """Test that the direct rendering matches DRF's field-by-field output."""
+        from django.utils import timezone
+        from rest_framework import serializers
+
+        todo = Todo.objects.create(
+            user=password_user,
+            title='Test Todo',
+            due_date=timezone.now()
+        )
+        serializer = TodoSerializer()
+
+        generic = serializers.ModelSerializer.to_representation(serializer, todo)
+        assert serializer.to_representation(todo) == generic
+
+        todo.due_date = None
+        generic = serializers.ModelSerializer.to_representation(serializer, todo)
+        assert serializer.to_representation(todo) == generic
+
+    def test_render_one(self, user_with_todos):
+        """Test that the shared renderer matches a per-instance serializer."""
+        for todo in (user_with_todos.high, user_with_todos.done):
+            assert TodoSerializer.render_one(todo) == TodoSerializer(todo).data
+
+    def test_render_one_subclass(self, user_with_todos):
+        """Test that a subclass renders with its own to_representation."""
+        class TitleOnlySerializer(TodoSerializer):
+            def to_representation(self, instance):
+                return {'title': instance.title}
+
+        todo = user_with_todos.high
+        TodoSerializer.render_one(todo)
+
+        assert TitleOnlySerializer.render_one(todo) == {'title': todo.title}
+        assert TodoSerializer.render_one(todo) == TodoSerializer(todo).data
+
+    def test_fields_not_shared_between_instances(self):
+        """Test that cached fields are copied for each serializer instance."""
+        first = TodoSerializer().fields
+        second = TodoSerializer().fields
+
+        assert list(first) == list(second)
+        assert first['title'] is not second['title']
+        assert first['title'].parent is not second['title'].parent
+
+
+@pytest.mark.django_db
+class TestTodoListSerializer:
+    """Test cases for TodoListSerializer."""
+
+    def test_serialize_todos(self, user_with_todos):
+        """Test serializing a list of todos."""
+        todos = Todo.objects.filter(user=user_with_todos.user)
+
+        data = TodoListSerializer(todos, many=True).data
+
+        assert len(data) == 3
+        assert data[0]['title'] == 'High priority task'
+        assert data[0]['description'] == 'Important work'
+        assert 'updated_at' in data[0]
+
+    def test_all_fields_read_only(self):
+        """Test that the list serializer never accepts writes."""
+        serializer = TodoListSerializer()
+
+        assert all(field.read_only for field in serializer.fields.values())
+
 
 @pytest.mark.django_db
 class TestTodoCreateSerializer:
@@ -99,6 +171,25 @@ class TestTodoCreateSerializer:
         assert todo.user == password_user
         assert todo.title == 'New Todo'
 
+    def test_completed_ignored_and_full_todo_rendered(self, password_user):
+        """Test that completed can't be set on create and the response is the full todo."""
+        from django.test import RequestFactory
+
+        request = RequestFactory().post('/')
+        request.user = password_user
+
+        serializer = TodoCreateSerializer(
+            data={'title': 'New Todo', 'completed': True},
+            context={'request': request}
+        )
+        assert serializer.is_valid()
+        todo = serializer.save()
+
+        assert todo.completed is False
+        assert serializer.data['id'] == str(todo.id)
+        assert serializer.data['completed'] is False
+        assert 'created_at' in serializer.data
+
 
 @pytest.mark.django_db
 class TestTodoUpdateSerializer:
@@ -1,24 +1,22 @@
 """
 Tests for Todo views/API endpoints.
 """
+import json
+
 import pytest
 from django.urls import reverse
-from django.contrib.auth import get_user_model
+from django.utils import timezone
 from todos.models import Todo
 
-User = get_user_model()
-
 
 @pytest.mark.django_db
 class TestTodoListCreate:
     """Test cases for listing and creating todos."""
 
-    def test_list_todos_authenticated(self, api_client, user_with_todos):
+    def test_list_todos_authenticated(self, api_client, user_with_todos, bearer_header):
         """Test listing todos for authenticated user."""
         # Authenticate with the user that has todos
-        from rest_framework_simplejwt.tokens import RefreshToken
-        refresh = RefreshToken.for_user(user_with_todos)
-        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        api_client.credentials(**bearer_header)
 
         url = reverse('todo-list-create')
         response = api_client.get(url)
@@ -33,18 +31,11 @@ class TestTodoListCreate:
         assert results[0]['title'] == 'High priority task'
         assert results[0]['priority'] == 10
 
-    def test_list_todos_only_own(self, api_client, user_with_todos):
+    def test_list_todos_only_own(self, api_client, user_with_todos, bearer_header, other_user):
         """Test that users only see their own todos."""
         # Authenticate with the user that has todos
-        from rest_framework_simplejwt.tokens import RefreshToken
-        refresh = RefreshToken.for_user(user_with_todos)
-        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
-        # Create another user with todos
-        other_user = User.objects.create_user(
-            email='other@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
+        api_client.credentials(**bearer_header)
+        # Give another user a todo
         Todo.objects.create(
             user=other_user,
             title='Other user todo',
@@ -63,6 +54,43 @@ class TestTodoListCreate:
         titles = [todo['title'] for todo in results]
         assert 'Other user todo' not in titles
 
+    def test_list_todos_match_detail_representation(self, auth_client, user_with_todos):
+        """Test that list rows render exactly like the detail endpoint."""
+        todo = user_with_todos.high
+        todo.due_date = timezone.now()
+        todo.save()
+
+        list_response = auth_client.get(reverse('todo-list-create'))
+        detail_response = auth_client.get(reverse('todo-detail', kwargs={'pk': todo.id}))
+
+        listed = json.loads(list_response.content)['results'][0]
+        assert listed == json.loads(detail_response.content)
+
+    def test_list_todos_not_modified(self, auth_client, user_with_todos):
+        """Test that a matching If-None-Match returns 304 without a body."""
+        url = reverse('todo-list-create')
+        response = auth_client.get(url)
+        etag = response['ETag']
+
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_list_todos_etag_changes_on_update(self, auth_client, user_with_todos):
+        """Test that modifying a todo invalidates the list ETag."""
+        url = reverse('todo-list-create')
+        etag = auth_client.get(url)['ETag']
+
+        detail_url = reverse('todo-detail', kwargs={'pk': user_with_todos.low.id})
+        auth_client.patch(detail_url, {'completed': True}, format='json')
+
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
     def test_list_todos_unauthenticated(self, api_client):
         """Test that unauthenticated users cannot list todos."""
         url = reverse('todo-list-create')
@@ -70,6 +98,16 @@ class TestTodoListCreate:
 
         assert response.status_code == 401
 
+    def test_list_todos_inactive_user(self, api_client, password_user, bearer_header):
+        """Test that a token for a deactivated user is rejected."""
+        password_user.is_active = False
+        password_user.save(update_fields=['is_active'])
+        api_client.credentials(**bearer_header)
+
+        response = api_client.get(reverse('todo-list-create'))
+
+        assert response.status_code == 401
+
     def test_create_todo(self, auth_client):
         """Test creating a new todo."""
         url = reverse('todo-list-create')
@@ -137,7 +175,7 @@ class TestTodoRetrieveUpdateDestroy:
 
     def test_retrieve_todo(self, auth_client, user_with_todos):
         """Test retrieving a specific todo."""
-        todo = Todo.objects.filter(user=auth_client.user).first()
+        todo = user_with_todos.high
         url = reverse('todo-detail', kwargs={'pk': todo.id})
 
         response = auth_client.get(url)
@@ -146,27 +184,50 @@ class TestTodoRetrieveUpdateDestroy:
         assert response.data['id'] == str(todo.id)
         assert response.data['title'] == todo.title
 
-    def test_retrieve_other_users_todo(self, auth_client):
-        """Test that users cannot retrieve other users' todos."""
-        # Create another user with a todo
-        other_user = User.objects.create_user(
-            email='other@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
-        other_todo = Todo.objects.create(
-            user=other_user,
-            title='Other user todo'
-        )
+    def test_retrieve_todo_single_query(self, auth_client, user_with_todos):
+        """Test that a plain GET fetches the todo once and still sends an ETag."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
 
-        url = reverse('todo-detail', kwargs={'pk': other_todo.id})
-        response = auth_client.get(url)
+        url = reverse('todo-detail', kwargs={'pk': user_with_todos.high.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = auth_client.get(url)
+
+        assert response.status_code == 200
+        assert response['ETag']
+        assert len([q for q in queries if '"todos"' in q['sql']]) == 1
+
+    def test_retrieve_todo_not_modified(self, auth_client, user_with_todos):
+        """Test that a matching If-None-Match returns 304 until the todo changes."""
+        url = reverse('todo-detail', kwargs={'pk': user_with_todos.high.id})
+        etag = auth_client.get(url)['ETag']
+
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+        assert not response.content
+
+        auth_client.patch(url, {'completed': True}, format='json')
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    @pytest.mark.parametrize('method', ['get', 'patch', 'delete'])
+    def test_other_users_todo_not_found(self, auth_client, other_user_todo, method):
+        """Test that users cannot retrieve, update, or delete other users' todos."""
+        url = reverse('todo-detail', kwargs={'pk': other_user_todo.id})
+        kwargs = {'data': {'completed': True}, 'format': 'json'} if method == 'patch' else {}
+
+        response = getattr(auth_client, method)(url, **kwargs)
 
         assert response.status_code == 404
 
+        # Verify todo was neither modified nor deleted
+        assert Todo.objects.filter(id=other_user_todo.id, completed=False).exists()
+
     def test_update_todo(self, auth_client, user_with_todos):
         """Test updating a todo."""
-        todo = Todo.objects.filter(user=auth_client.user).first()
+        todo = user_with_todos.high
         url = reverse('todo-detail', kwargs={'pk': todo.id})
 
         data = {
@@ -189,7 +250,7 @@ class TestTodoRetrieveUpdateDestroy:
 
     def test_update_todo_partial(self, auth_client, user_with_todos):
         """Test partial update of a todo."""
-        todo = Todo.objects.filter(user=auth_client.user).first()
+        todo = user_with_todos.high
         original_title = todo.title
 
         url = reverse('todo-detail', kwargs={'pk': todo.id})
@@ -203,28 +264,9 @@ class TestTodoRetrieveUpdateDestroy:
         assert response.data['completed'] is True
         assert response.data['title'] == original_title  # Title unchanged
 
-    def test_update_other_users_todo(self, auth_client):
-        """Test that users cannot update other users' todos."""
-        other_user = User.objects.create_user(
-            email='other@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
-        other_todo = Todo.objects.create(
-            user=other_user,
-            title='Other user todo'
-        )
-
-        url = reverse('todo-detail', kwargs={'pk': other_todo.id})
-        data = {'completed': True}
-
-        response = auth_client.patch(url, data, format='json')
-
-        assert response.status_code == 404
-
     def test_delete_todo(self, auth_client, user_with_todos):
         """Test deleting a todo."""
-        todo = Todo.objects.filter(user=auth_client.user).first()
+        todo = user_with_todos.high
         todo_id = todo.id
 
         url = reverse('todo-detail', kwargs={'pk': todo_id})
@@ -236,26 +278,6 @@ class TestTodoRetrieveUpdateDestroy:
         # Verify todo was deleted
         assert not Todo.objects.filter(id=todo_id).exists()
 
-    def test_delete_other_users_todo(self, auth_client):
-        """Test that users cannot delete other users' todos."""
-        other_user = User.objects.create_user(
-            email='other@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
-        other_todo = Todo.objects.create(
-            user=other_user,
-            title='Other user todo'
-        )
-
-        url = reverse('todo-detail', kwargs={'pk': other_todo.id})
-        response = auth_client.delete(url)
-
-        assert response.status_code == 404
-
-        # Verify todo was not deleted
-        assert Todo.objects.filter(id=other_todo.id).exists()
-
     def test_todo_operations_unauthenticated(self, api_client, password_user):
         """Test that unauthenticated users cannot perform todo operations."""
         todo = Todo.objects.create(
@@ -276,3 +298,76 @@ class TestTodoRetrieveUpdateDestroy:
         # DELETE
         response = api_client.delete(url)
         assert response.status_code == 401
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Route the rate limiter to an in-memory Redis that runs its Lua script."""
+    import fakeredis
+    from todos import ratelimit
+
+    client = fakeredis.FakeStrictRedis()
+    monkeypatch.setattr(ratelimit, 'redis_client', lambda: client)
+    monkeypatch.setattr(ratelimit, '_script', None)
+    return client
+
+
+@pytest.mark.django_db
+class TestSlidingWindowRatelimit:
+    """Test cases for the per-user todo rate limiter."""
+
+    def test_requests_over_limit_are_throttled(self, password_user):
+        """Test that requests beyond the rate get a 429."""
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from rest_framework.exceptions import Throttled
+        from todos.ratelimit import sliding_window_ratelimit
+
+        cache.clear()
+        view = sliding_window_ratelimit('todos.test', '2/m', 'POST')(lambda request: 'ok')
+        request = RequestFactory().post('/')
+        request.user = password_user
+
+        assert view(request) == 'ok'
+        assert view(request) == 'ok'
+        with pytest.raises(Throttled) as excinfo:
+            view(request)
+        assert excinfo.value.status_code == 429
+
+        # Other methods are not counted
+        get_request = RequestFactory().get('/')
+        get_request.user = password_user
+        assert view(get_request) == 'ok'
+
+    def test_disabled_by_setting(self, password_user, settings, fake_redis):
+        """Test that RATELIMIT_ENABLE=False lifts the limit on an already decorated view."""
+        from django.test import RequestFactory
+        from todos.ratelimit import sliding_window_ratelimit
+
+        view = sliding_window_ratelimit('todos.test', '1/m', 'POST')(lambda request: 'ok')
+        settings.RATELIMIT_ENABLE = False
+        request = RequestFactory().post('/')
+        request.user = password_user
+
+        assert view(request) == 'ok'
+        assert view(request) == 'ok'
+
+    def test_redis_sliding_window(self, password_user, fake_redis):
+        """Test that the Redis Lua path throttles and counts all listed methods together."""
+        from django.test import RequestFactory
+        from rest_framework.exceptions import Throttled
+        from todos.ratelimit import sliding_window_ratelimit
+
+        view = sliding_window_ratelimit('todos.test', '2/m', ['PATCH', 'PUT'])(lambda request: 'ok')
+        patch_request = RequestFactory().patch('/')
+        patch_request.user = password_user
+        put_request = RequestFactory().put('/')
+        put_request.user = password_user
+
+        assert view(patch_request) == 'ok'
+        assert view(put_request) == 'ok'
+        with pytest.raises(Throttled):
+            view(patch_request)
+        with pytest.raises(Throttled):
+            view(put_request)
+        assert len(fake_redis.keys()) == 1
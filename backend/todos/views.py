@@ -1,13 +1,28 @@
+import hashlib
+
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from django.db.models import Count, Max
 from django.utils.decorators import method_decorator
-from django_ratelimit.decorators import ratelimit
+from django.utils.http import parse_etags, quote_etag
+from users.authentication import LightweightJWTAuthentication
 from .models import Todo
-from .serializers import TodoSerializer, TodoCreateSerializer, TodoUpdateSerializer
+from .ratelimit import sliding_window_ratelimit
+from .serializers import (
+    TodoSerializer,
+    TodoListSerializer,
+    TodoCreateSerializer,
+    TodoUpdateSerializer,
+)
+
 
+def _etag(key):
+    """Quote a short, non-cryptographic digest of key for use as an ETag."""
+    return quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
 
-@method_decorator(ratelimit(key='user', rate='100/h', method='POST'), name='create')
-@method_decorator(ratelimit(key='user', rate='500/h', method='GET'), name='list')
+
+@method_decorator(sliding_window_ratelimit('todos.create', '100/h', 'POST'), name='create')
+@method_decorator(sliding_window_ratelimit('todos.list', '500/h', 'GET'), name='list')
 class TodoListCreateView(generics.ListCreateAPIView):
     """
     API endpoint to list all todos for the authenticated user and create new todos.
@@ -17,31 +32,66 @@ class TodoListCreateView(generics.ListCreateAPIView):
 
     Rate limits: 100 creates/hour, 500 list requests/hour per user
     """
+    authentication_classes = [LightweightJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         """Return only todos belonging to the authenticated user."""
-        return Todo.objects.filter(user=self.request.user)
+        queryset = Todo.objects.filter(user_id=self.request.user.id)
+        if self.request.method == 'GET':
+            # Fetch plain dicts of just the listed columns; no model instances
+            queryset = queryset.values(*TodoListSerializer.Meta.fields)
+        return queryset
+
+    serializer_classes = {'POST': TodoCreateSerializer}
+    default_serializer_class = TodoListSerializer
 
     def get_serializer_class(self):
         """Use different serializers for list vs create."""
-        if self.request.method == 'POST':
-            return TodoCreateSerializer
-        return TodoSerializer
+        return self.serializer_classes.get(self.request.method, self.default_serializer_class)
+
+    def list(self, request, *args, **kwargs):
+        """List todos, answering 304 Not Modified if the client's copy is current."""
+        etag = self.get_list_etag(request)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        # Rows are already plain dicts; the JSON renderer encodes UUIDs and
+        # datetimes itself, so the serializer pass is skipped entirely.
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(page)
+        else:
+            response = Response(list(queryset))
+
+        response['ETag'] = etag
+        return response
+
+    def get_list_etag(self, request):
+        """
+        Build an ETag for the user's todo list from a single aggregate query.
+        Any create, update, or delete changes the latest updated_at or the count.
+        """
+        summary = Todo.objects.filter(user_id=request.user.id).aggregate(
+            last_updated=Max('updated_at'),
+            total=Count('id'),
+        )
+        key = f"{summary['last_updated']}:{summary['total']}:{request.get_full_path()}"
+        return _etag(key)
 
     def create(self, request, *args, **kwargs):
         """Create a todo and return the full serialized response."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        todo = serializer.save()
+        serializer.save()
 
-        # Return full todo data using TodoSerializer
-        response_serializer = TodoSerializer(todo)
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        # The create serializer renders the full todo; no second serializer needed
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-@method_decorator(ratelimit(key='user', rate='200/h', method=['PATCH', 'PUT']), name='update')
-@method_decorator(ratelimit(key='user', rate='100/h', method='DELETE'), name='destroy')
+@method_decorator(sliding_window_ratelimit('todos.update', '200/h', ['PATCH', 'PUT']), name='update')
+@method_decorator(sliding_window_ratelimit('todos.destroy', '100/h', 'DELETE'), name='destroy')
 class TodoRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     """
     API endpoint to retrieve, update, or delete a specific todo.
@@ -52,17 +102,49 @@ class TodoRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
 
     Rate limits: 200 updates/hour, 100 deletes/hour per user
     """
+    authentication_classes = [LightweightJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         """Return only todos belonging to the authenticated user."""
-        return Todo.objects.filter(user=self.request.user)
+        # Load just the serialized columns; the owner row is never read
+        return Todo.objects.filter(user_id=self.request.user.id).only(*TodoSerializer.Meta.fields)
+
+    serializer_classes = {'PATCH': TodoUpdateSerializer, 'PUT': TodoUpdateSerializer}
+    default_serializer_class = TodoSerializer
 
     def get_serializer_class(self):
         """Use different serializers for retrieve vs update."""
-        if self.request.method in ['PATCH', 'PUT']:
-            return TodoUpdateSerializer
-        return TodoSerializer
+        return self.serializer_classes.get(self.request.method, self.default_serializer_class)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a todo, answering 304 Not Modified if the client's copy is current."""
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            # Probe just id and updated_at, so a match never loads the full row
+            etag = self.get_detail_etag()
+            if etag is not None and etag in parse_etags(if_none_match):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        instance = self.get_object()
+        response = Response(TodoSerializer.render_one(instance))
+        response['ETag'] = self.detail_etag(instance.id, instance.updated_at)
+        return response
+
+    def get_detail_etag(self):
+        """
+        Build an ETag for the requested todo without loading the full row.
+        Returns None if the todo does not exist for this user.
+        """
+        row = self.get_queryset().filter(pk=self.kwargs['pk']).values('id', 'updated_at').first()
+        if row is None:
+            return None
+        return self.detail_etag(row['id'], row['updated_at'])
+
+    @staticmethod
+    def detail_etag(todo_id, updated_at):
+        """Build a todo's ETag from its id and updated_at alone."""
+        return _etag(f'{todo_id}:{updated_at.timestamp()}')
 
     def update(self, request, *args, **kwargs):
         """Update a todo and return the full serialized response."""
@@ -70,11 +152,10 @@ class TodoRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        todo = serializer.save()
+        serializer.save()
 
-        # Return full todo data using TodoSerializer
-        response_serializer = TodoSerializer(todo)
-        return Response(response_serializer.data)
+        # The update serializer renders the full todo; no second serializer needed
+        return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
         """Delete a todo and return a success message."""
@@ -1,8 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import User
 
 
+class UserChangeList(ChangeList):
+    """Change list that loads only the displayed columns of each user."""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.list_display)
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     """Admin interface for the custom User model."""
@@ -14,7 +23,7 @@ class UserAdmin(BaseUserAdmin):
 
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
-        ('Authentication', {'fields': ('auth_method', 'passkey_credential')}),
+        ('Authentication', {'fields': ('auth_method', 'passkey_credential', 'passkey_sign_count')}),
         ('Two-Factor Authentication', {'fields': ('totp_secret', 'totp_enabled')}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         ('Important dates', {'fields': ('last_login', 'created_at', 'updated_at')}),
@@ -28,3 +37,8 @@ class UserAdmin(BaseUserAdmin):
     )
 
     readonly_fields = ('created_at', 'updated_at', 'last_login')
+
+    def get_changelist(self, request, **kwargs):
+        # Skip password, passkey and TOTP columns on the list page; the
+        # change form still loads the full row.
+        return UserChangeList
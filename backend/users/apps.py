@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Build the password validators (and load CommonPasswordValidator's
+        # word list) at startup rather than on the first registration
+        from django.contrib.auth.password_validation import get_default_password_validators
+        get_default_password_validators()
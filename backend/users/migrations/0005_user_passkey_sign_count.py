@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-15 21:59
+
+from django.db import migrations, models
+
+
+def move_sign_count_out(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    users = list(User.objects.exclude(passkey_credential=None))
+    for user in users:
+        user.passkey_sign_count = user.passkey_credential.pop('sign_count', 0) or 0
+    User.objects.bulk_update(users, ['passkey_credential', 'passkey_sign_count'], batch_size=1000)
+
+
+def move_sign_count_back(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    users = list(User.objects.exclude(passkey_credential=None))
+    for user in users:
+        user.passkey_credential['sign_count'] = user.passkey_sign_count
+    User.objects.bulk_update(users, ['passkey_credential'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_remove_user_age'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='passkey_sign_count',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(move_sign_count_out, move_sign_count_back),
+    ]
@@ -1,9 +1,29 @@
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 from django.utils import timezone
 
 
+# Below this many passwords, hashing inline beats handing work to threads
+PARALLEL_HASH_THRESHOLD = 8
+# Upper bound on hashing threads, so a bulk import can't take over the process
+MAX_HASH_WORKERS = 4
+
+
+def _hash_passwords(passwords):
+    """
+    Hash passwords, spreading large batches over a few threads.
+    Argon2 releases the GIL while hashing, so threads run in parallel
+    without forking the (possibly multi-threaded) calling process.
+    """
+    if len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    with ThreadPoolExecutor(max_workers=MAX_HASH_WORKERS) as pool:
+        return list(pool.map(make_password, passwords))
+
+
 class UserManager(BaseUserManager):
     """Custom user manager for email-based authentication."""
 
@@ -18,6 +38,31 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def bulk_create_users(self, rows, batch_size=1000):
+        """
+        Create many users from dicts of create_user() arguments.
+        Inserts in batches instead of one INSERT per user, and hashes large
+        batches of passwords on a small thread pool.
+        """
+        users = []
+        passwords = []
+        for row in rows:
+            fields = dict(row)
+            email = fields.pop('email', None)
+            if not email:
+                raise ValueError('The Email field must be set')
+            password = fields.pop('password', None)
+            user = self.model(email=self.normalize_email(email), **fields)
+            if password:
+                passwords.append((user, password))
+            users.append(user)
+
+        # Hashing dominates the cost of a batch; run it on a few threads
+        hashes = _hash_passwords([password for _, password in passwords])
+        for (user, _), encoded in zip(passwords, hashes):
+            user.password = encoded
+        return self.bulk_create(users, batch_size=batch_size)
+
     def create_superuser(self, email, password=None, **extra_fields):
         """Create and return a superuser with an email and password."""
         extra_fields.setdefault('is_staff', True)
@@ -56,6 +101,8 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     # Passkey auth (stores WebAuthn credential)
     passkey_credential = models.JSONField(blank=True, null=True)
+    # Bumped on every passkey login, so kept out of the credential JSON
+    passkey_sign_count = models.PositiveBigIntegerField(default=0)
 
     # TOTP 2FA (optional for all users)
     totp_secret = models.CharField(max_length=32, blank=True, null=True)
@@ -91,4 +138,4 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def has_usable_password(self):
         """Check if user has a usable password."""
-        return self.auth_method == 'password' and self.password
+        return self.auth_method == 'password' and bool(self.password)
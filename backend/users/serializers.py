@@ -1,15 +1,34 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.contrib.auth.password_validation import validate_password
+from giterdone.serializers import CachedFieldsMixin
 import pyotp
-import qrcode
+import segno
 import io
+import os
 import base64
 
 User = get_user_model()
 
+# Fixed QR encoding parameters for TOTP enrollment codes. The codes are shown
+# on screen, so low error correction is enough, and a fixed mask skips
+# scoring all eight masks, which is most of the encoding time.
+_QR_ENCODE_OPTIONS = {'error': 'L', 'boost_error': False, 'mask': 0, 'micro': False}
+_QR_SVG_OPTIONS = {'kind': 'svg', 'scale': 10, 'border': 5, 'dark': 'black', 'light': 'white'}
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+
+def _check_password_pair(auth_method, password, password_confirm, required_message):
+    """Require a matching password and confirmation when auth_method is 'password'."""
+    if auth_method != 'password':
+        return
+    if not password:
+        raise serializers.ValidationError({'password': required_message})
+    if password != password_confirm:
+        raise serializers.ValidationError({'password_confirm': 'Passwords do not match.'})
+
+
+class UserRegistrationSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Serializer for user registration with password or passkey."""
 
     password = serializers.CharField(
@@ -39,15 +58,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         password_confirm = attrs.get('password_confirm')
 
         # Password auth requires password fields
-        if auth_method == 'password':
-            if not password:
-                raise serializers.ValidationError({
-                    'password': 'Password is required for password authentication.'
-                })
-            if password != password_confirm:
-                raise serializers.ValidationError({
-                    'password_confirm': 'Passwords do not match.'
-                })
+        _check_password_pair(
+            auth_method, password, password_confirm,
+            'Password is required for password authentication.'
+        )
 
         # Passkey auth doesn't need password
         if auth_method == 'passkey':
@@ -72,7 +86,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Serializer for user profile information."""
 
     class Meta:
@@ -84,8 +98,25 @@ class UserSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'email', 'created_at', 'updated_at']
 
-
-class ProfileUpdateSerializer(serializers.ModelSerializer):
+    # Seconds a rendered profile stays cached
+    CACHE_TIMEOUT = 60 * 60
+
+    @classmethod
+    def serialized(cls, user):
+        """
+        Return the user's serialized data, reusing a cached copy when possible.
+        The key includes updated_at, so saving the user invalidates it; writes
+        that bypass save() must set updated_at themselves.
+        """
+        key = f'user_data:{user.pk}:{user.updated_at.timestamp()}'
+        data = cache.get(key)
+        if data is None:
+            data = cls(user).data
+            cache.set(key, data, timeout=cls.CACHE_TIMEOUT)
+        return data
+
+
+class ProfileUpdateSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     """Serializer for updating user profile."""
 
     class Meta:
@@ -119,40 +150,26 @@ class TOTPEnrollSerializer(serializers.Serializer):
 
     def generate_totp_secret(self, user):
         """Generate TOTP secret and QR code for enrollment."""
-        secret = pyotp.random_base32()
+        # 160 random bits from a single CSPRNG read; encodes to 32 base32 chars
+        secret = base64.b32encode(os.urandom(20)).decode()
         totp_uri = pyotp.totp.TOTP(secret).provisioning_uri(
             name=user.email,
             issuer_name='Giterdone'
         )
 
-        # Generate QR code
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(totp_uri)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
+        # Generate QR code as SVG; skips the PIL raster and PNG encode steps
+        qr = segno.make(totp_uri, **_QR_ENCODE_OPTIONS)
         buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
+        qr.save(buffer, **_QR_SVG_OPTIONS)
         qr_code_base64 = base64.b64encode(buffer.getvalue()).decode()
 
         return {
             'secret': secret,
-            'qr_code': f'data:image/png;base64,{qr_code_base64}',
+            'qr_code': f'data:image/svg+xml;base64,{qr_code_base64}',
             'totp_uri': totp_uri
         }
 
 
-class TOTPVerifySerializer(serializers.Serializer):
-    """Serializer for TOTP verification."""
-
-    code = serializers.CharField(max_length=6, min_length=6)
-
-    def validate_code(self, value):
-        if not value.isdigit():
-            raise serializers.ValidationError('TOTP code must contain only digits.')
-        return value
-
-
 class AccountRecoveryRequestSerializer(serializers.Serializer):
     """Serializer for requesting account recovery."""
 
@@ -177,19 +194,12 @@ class AccountRecoveryConfirmSerializer(serializers.Serializer):
     )
 
     def validate(self, attrs):
-        new_auth_method = attrs.get('new_auth_method')
-        password = attrs.get('password')
-        password_confirm = attrs.get('password_confirm')
-
-        if new_auth_method == 'password':
-            if not password:
-                raise serializers.ValidationError({
-                    'password': 'Password is required when choosing password authentication.'
-                })
-            if password != password_confirm:
-                raise serializers.ValidationError({
-                    'password_confirm': 'Passwords do not match.'
-                })
+        _check_password_pair(
+            attrs.get('new_auth_method'),
+            attrs.get('password'),
+            attrs.get('password_confirm'),
+            'Password is required when choosing password authentication.'
+        )
 
         attrs.pop('password_confirm', None)
         return attrs
@@ -1,21 +1,111 @@
 """
 Tests for authentication views.
 """
+from datetime import datetime, timezone
+
 import pytest
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from freezegun import freeze_time
 import pyotp
+from rest_framework_simplejwt.tokens import RefreshToken
 
 User = get_user_model()
 
+# Resolved once at import; pytest-django has set up Django before collection
+URL_REGISTER = reverse('user-register')
+URL_LOGIN = reverse('password-login')
+URL_CHECK_AUTH_METHOD = reverse('check-auth-method')
+URL_PROFILE = reverse('user-profile')
+URL_PROFILE_UPDATE = reverse('profile-update')
+URL_TOTP_ENROLL = reverse('totp-enroll')
+URL_TOTP_VERIFY = reverse('totp-verify')
+URL_TOTP_DISABLE = reverse('totp-disable')
+URL_RECOVERY_REQUEST = reverse('recovery-request')
+URL_RECOVERY_CONFIRM = reverse('recovery-confirm')
+URL_PASSKEY_ENROLL = reverse('passkey-enroll')
+URL_PASSKEY_LOGIN = reverse('passkey-login')
+URL_TOKEN_REFRESH = reverse('token-refresh')
+URL_PASSWORD_CHANGE = reverse('password-change')
+
+# TOTP tests run at a fixed instant, so codes for the test secret are constant
+TOTP_TEST_SECRET = 'JBSWY3DPEHPK3PXP'
+FROZEN_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+FROZEN_TOTP_CODE = pyotp.TOTP(TOTP_TEST_SECRET).at(FROZEN_TIME)
+
+OLD_PASSWORD = 'OldPassword123!@#$'
+
+# Credential sent by the passkey enrollment and login tests; never mutated
+PASSKEY_CREDENTIAL = {
+    'id': 'test_credential_id',
+    'type': 'public-key',
+    'response': 'test_response'
+}
+
+
+class _StubQRCode:
+    """Stands in for a segno QR code; writes a fixed SVG."""
+
+    def save(self, out, **kwargs):
+        out.write(b'<svg xmlns="http://www.w3.org/2000/svg"/>')
+
+
+@pytest.fixture
+def stub_qr(monkeypatch):
+    """Skip QR encoding; the tests only check the data URI around it."""
+    monkeypatch.setattr('users.serializers.segno.make', lambda *args, **kwargs: _StubQRCode())
+
+
+@pytest.fixture(scope='session')
+def recovery_token(session_users):
+    """Return a recovery token for the shared password user, signed once per session."""
+    from users.views import _RECOVERY_SIGNER
+
+    return _RECOVERY_SIGNER.sign(str(session_users['password']))
+
+
+@pytest.fixture
+def password_authed_user(auth_client):
+    """Give the authenticated user the password OLD_PASSWORD without a full save()."""
+    user = auth_client.user
+    User.objects.filter(pk=user.pk).update(
+        password=make_password(OLD_PASSWORD), auth_method='password'
+    )
+    user.refresh_from_db(fields=['password', 'auth_method'])
+    return user
+
+
+@pytest.fixture
+def totp_enrolled_user(auth_client):
+    """Enroll the authenticated user with TOTP_TEST_SECRET, skipping the enroll view."""
+    user = auth_client.user
+    user.totp_secret = TOTP_TEST_SECRET
+    user.save(update_fields=['totp_secret'])
+    return user
+
+
+@pytest.fixture
+def totp_enabled_user(totp_enrolled_user):
+    """Enroll the authenticated user and turn TOTP on."""
+    totp_enrolled_user.totp_enabled = True
+    totp_enrolled_user.save(update_fields=['totp_enabled'])
+    return totp_enrolled_user
+
+
+@pytest.fixture
+def frozen_time():
+    """Freeze the clock at FROZEN_TIME; request it before any token-issuing fixture."""
+    with freeze_time(FROZEN_TIME):
+        yield
+
 
 @pytest.mark.django_db
 class TestUserRegistration:
     """Test cases for user registration."""
 
-    def test_register_with_password(self, api_client):
+    def test_register_with_password(self, api_client, json_post):
         """Test successful registration with password."""
-        url = reverse('user-register')
         data = {
             'email': 'newuser@example.com',
             'password': 'SecurePassword123!',
@@ -23,7 +113,7 @@ class TestUserRegistration:
             'auth_method': 'password'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_REGISTER, data)
 
         assert response.status_code == 201
         assert 'user' in response.data
@@ -37,22 +127,20 @@ class TestUserRegistration:
         user = User.objects.get(email='newuser@example.com')
         assert user.check_password('SecurePassword123!')
 
-    def test_register_with_passkey(self, api_client):
+    def test_register_with_passkey(self, api_client, json_post):
         """Test successful registration with passkey."""
-        url = reverse('user-register')
         data = {
             'email': 'passkey@example.com',
             'auth_method': 'passkey'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_REGISTER, data)
 
         assert response.status_code == 201
         assert response.data['user']['auth_method'] == 'passkey'
 
-    def test_register_password_mismatch(self, api_client):
+    def test_register_password_mismatch(self, api_client, json_post):
         """Test registration fails when passwords don't match."""
-        url = reverse('user-register')
         data = {
             'email': 'newuser@example.com',
             'password': 'SecurePassword123!',
@@ -60,27 +148,25 @@ class TestUserRegistration:
             'auth_method': 'password'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_REGISTER, data)
 
         assert response.status_code == 400
         assert 'password_confirm' in response.data
 
-    def test_register_missing_password_for_password_auth(self, api_client):
+    def test_register_missing_password_for_password_auth(self, api_client, json_post):
         """Test registration fails when password is missing for password auth."""
-        url = reverse('user-register')
         data = {
             'email': 'newuser@example.com',
             'auth_method': 'password'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_REGISTER, data)
 
         assert response.status_code == 400
         assert 'password' in response.data
 
-    def test_register_duplicate_email(self, api_client, password_user):
+    def test_register_duplicate_email(self, api_client, password_user, json_post):
         """Test registration fails with duplicate email."""
-        url = reverse('user-register')
         data = {
             'email': password_user.email,
             'password': 'SecurePassword123!',
@@ -88,111 +174,129 @@ class TestUserRegistration:
             'auth_method': 'password'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_REGISTER, data)
 
         assert response.status_code == 400
 
 
 @pytest.mark.django_db
+@pytest.mark.usefixtures('frozen_time')
 class TestPasswordLogin:
     """Test cases for password-based login."""
 
-    def test_successful_login(self, api_client, password_user):
-        """Test successful login with correct credentials."""
-        url = reverse('password-login')
-        data = {
-            'email': password_user.email,
-            'password': 'TestPassword123!'
-        }
-
-        response = api_client.post(url, data, format='json')
-
-        assert response.status_code == 200
-        assert 'user' in response.data
-        assert 'tokens' in response.data
-        assert response.data['message'] == 'Login successful.'
-
-    def test_login_wrong_password(self, api_client, password_user):
-        """Test login fails with wrong password."""
-        url = reverse('password-login')
-        data = {
-            'email': password_user.email,
-            'password': 'WrongPassword123!'
-        }
-
-        response = api_client.post(url, data, format='json')
-
-        assert response.status_code == 401
-        assert 'error' in response.data
+    @pytest.fixture
+    def login_email(self, request):
+        """Return the email of the `<kind>_user` fixture named by the parameter, or an unknown one."""
+        if request.param is None:
+            return 'nonexistent@example.com'
+        return request.getfixturevalue(f'{request.param}_user').email
+
+    @pytest.mark.parametrize(
+        'login_email, password, totp_code, expected_status, expected_data',
+        [
+            pytest.param(
+                'password', 'TestPassword123!', None, 200,
+                {'user': None, 'tokens': None, 'message': 'Login successful.'},
+                id='success',
+            ),
+            pytest.param(
+                'password', 'WrongPassword123!', None, 401, {'error': None},
+                id='wrong-password',
+            ),
+            pytest.param(
+                None, 'Password123!', None, 401, {},
+                id='nonexistent-user',
+            ),
+            pytest.param(
+                'passkey', 'Password123!', None, 400, {'error': 'passkey'},
+                id='wrong-auth-method',
+            ),
+            pytest.param(
+                'totp', 'TestPassword123!', None, 400, {'totp_required': True},
+                id='totp-missing-code',
+            ),
+            pytest.param(
+                'totp', 'TestPassword123!', FROZEN_TOTP_CODE, 200, {'tokens': None},
+                id='totp-valid-code',
+            ),
+            pytest.param(
+                'totp', 'TestPassword123!', '000000', 401, {'error': 'Invalid TOTP code'},
+                id='totp-invalid-code',
+            ),
+        ],
+        indirect=['login_email'],
+    )
+    def test_password_login(self, api_client, json_post, login_email, password,
+                            totp_code, expected_status, expected_data):
+        """
+        Test password login outcomes. In expected_data, None only requires the
+        key; strings must appear in the value; anything else must be equal.
+        """
+        data = {'email': login_email, 'password': password}
+        if totp_code is not None:
+            data['totp_code'] = totp_code
+
+        response = json_post(api_client, URL_LOGIN, data)
+
+        assert response.status_code == expected_status
+        for key, expected in expected_data.items():
+            assert key in response.data
+            if isinstance(expected, str):
+                assert expected in response.data[key]
+            elif expected is not None:
+                assert response.data[key] == expected
 
-    def test_login_nonexistent_user(self, api_client):
-        """Test login fails with non-existent email."""
-        url = reverse('password-login')
-        data = {
-            'email': 'nonexistent@example.com',
-            'password': 'Password123!'
-        }
 
-        response = api_client.post(url, data, format='json')
+@pytest.mark.django_db
+class TestAuthThrottling:
+    """Test cases for the per-IP limits on the auth endpoints."""
 
-        assert response.status_code == 401
+    def test_password_login_throttled(self, api_client, json_post):
+        """Test that the eleventh login attempt in a minute gets a 429."""
+        data = {'email': 'nonexistent@example.com', 'password': 'Password123!'}
+        for _ in range(10):
+            assert json_post(api_client, URL_LOGIN, data).status_code == 401
 
-    def test_login_wrong_auth_method(self, api_client, passkey_user):
-        """Test login fails when trying password auth on passkey account."""
-        url = reverse('password-login')
-        data = {
-            'email': passkey_user.email,
-            'password': 'Password123!'
-        }
+        response = json_post(api_client, URL_LOGIN, data)
 
-        response = api_client.post(url, data, format='json')
+        assert response.status_code == 429
 
-        assert response.status_code == 400
-        assert 'passkey' in response.data['error']
+    def test_forwarded_for_does_not_reset_throttle(self, api_client, json_post):
+        """Test that rotating X-Forwarded-For doesn't get a fresh throttle bucket."""
+        data = {'email': 'nonexistent@example.com', 'password': 'Password123!'}
+        for i in range(10):
+            api_client.credentials(HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+            assert json_post(api_client, URL_LOGIN, data).status_code == 401
 
-    def test_login_with_totp_missing_code(self, api_client, totp_user):
-        """Test login with TOTP enabled but no code provided."""
-        url = reverse('password-login')
-        data = {
-            'email': totp_user.email,
-            'password': 'TestPassword123!'
-        }
+        api_client.credentials(HTTP_X_FORWARDED_FOR='203.0.113.200')
+        response = json_post(api_client, URL_LOGIN, data)
 
-        response = api_client.post(url, data, format='json')
+        assert response.status_code == 429
 
-        assert response.status_code == 400
-        assert response.data['totp_required'] is True
 
-    def test_login_with_totp_valid_code(self, api_client, totp_user):
-        """Test login with TOTP enabled and valid code."""
-        totp = pyotp.TOTP(totp_user.totp_secret)
-        valid_code = totp.now()
+@pytest.mark.django_db
+class TestCheckAuthMethod:
+    """Test cases for looking up a user's authentication method."""
 
-        url = reverse('password-login')
-        data = {
-            'email': totp_user.email,
-            'password': 'TestPassword123!',
-            'totp_code': valid_code
-        }
+    def test_known_email(self, api_client, passkey_user, json_post):
+        """Test that the auth method comes from a single narrow query."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
 
-        response = api_client.post(url, data, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            response = json_post(api_client, URL_CHECK_AUTH_METHOD, {'email': passkey_user.email})
 
         assert response.status_code == 200
-        assert 'tokens' in response.data
-
-    def test_login_with_totp_invalid_code(self, api_client, totp_user):
-        """Test login fails with invalid TOTP code."""
-        url = reverse('password-login')
-        data = {
-            'email': totp_user.email,
-            'password': 'TestPassword123!',
-            'totp_code': '000000'
-        }
+        assert response.data['auth_method'] == 'passkey'
+        assert len(queries) == 1
+        assert 'passkey_credential' not in queries[0]['sql']
 
-        response = api_client.post(url, data, format='json')
+    def test_unknown_email(self, api_client, json_post):
+        """Test that an unknown email doesn't reveal whether the user exists."""
+        response = json_post(api_client, URL_CHECK_AUTH_METHOD, {'email': 'nobody@example.com'})
 
-        assert response.status_code == 401
-        assert 'Invalid TOTP code' in response.data['error']
+        assert response.status_code == 200
+        assert response.data['auth_method'] is None
 
 
 @pytest.mark.django_db
@@ -201,96 +305,76 @@ class TestUserProfile:
 
     def test_get_profile_authenticated(self, auth_client):
         """Test getting profile for authenticated user."""
-        url = reverse('user-profile')
-        response = auth_client.get(url)
+        response = auth_client.get(URL_PROFILE)
 
         assert response.status_code == 200
         assert response.data['email'] == auth_client.user.email
 
+    def test_get_profile_reflects_updates(self, auth_client):
+        """Test that a cached profile is not served after the user changes."""
+        auth_client.get(URL_PROFILE)
+
+        auth_client.patch(URL_PROFILE_UPDATE, {'first_name': 'Ada'}, format='json')
+        response = auth_client.get(URL_PROFILE)
+
+        assert response.data['first_name'] == 'Ada'
+
     def test_get_profile_unauthenticated(self, api_client):
         """Test getting profile fails without authentication."""
-        url = reverse('user-profile')
-        response = api_client.get(url)
+        response = api_client.get(URL_PROFILE)
 
         assert response.status_code == 401
 
 
 @pytest.mark.django_db
+@pytest.mark.usefixtures('frozen_time', 'stub_qr')
 class TestTOTPEnrollment:
     """Test cases for TOTP 2FA enrollment."""
 
     def test_enroll_totp(self, auth_client):
         """Test enrolling in TOTP 2FA."""
-        url = reverse('totp-enroll')
-        response = auth_client.post(url)
+        response = auth_client.post(URL_TOTP_ENROLL)
 
         assert response.status_code == 200
         assert 'qr_code' in response.data
         assert 'secret' in response.data
-        assert response.data['qr_code'].startswith('data:image/png;base64,')
+        assert response.data['qr_code'].startswith('data:image/svg+xml;base64,')
 
         # Verify secret was saved
-        auth_client.user.refresh_from_db()
+        auth_client.user.refresh_from_db(fields=['totp_secret'])
         assert auth_client.user.totp_secret is not None
 
-    def test_verify_totp_valid_code(self, auth_client):
+    def test_verify_totp_valid_code(self, auth_client, totp_enrolled_user, json_post):
         """Test verifying TOTP with valid code."""
-        # First enroll
-        enroll_url = reverse('totp-enroll')
-        enroll_response = auth_client.post(enroll_url)
-        secret = enroll_response.data['secret']
-
-        # Generate valid code
-        totp = pyotp.TOTP(secret)
-        valid_code = totp.now()
-
-        # Verify
-        verify_url = reverse('totp-verify')
-        data = {'code': valid_code}
-        response = auth_client.post(verify_url, data, format='json')
+        data = {'code': FROZEN_TOTP_CODE}
+        response = json_post(auth_client, URL_TOTP_VERIFY, data)
 
         assert response.status_code == 200
         assert 'enabled successfully' in response.data['message']
 
         # Verify TOTP is enabled
-        auth_client.user.refresh_from_db()
+        auth_client.user.refresh_from_db(fields=['totp_enabled'])
         assert auth_client.user.totp_enabled
 
-    def test_verify_totp_invalid_code(self, auth_client):
-        """Test verifying TOTP with invalid code."""
-        # First enroll
-        enroll_url = reverse('totp-enroll')
-        auth_client.post(enroll_url)
-
-        # Try invalid code
-        verify_url = reverse('totp-verify')
-        data = {'code': '000000'}
-        response = auth_client.post(verify_url, data, format='json')
+    @pytest.mark.parametrize('code', ['000000', '12345', '1234567', '12345a', ''])
+    def test_verify_totp_invalid_code(self, auth_client, totp_enrolled_user, json_post, code):
+        """Test verifying TOTP with a wrong or malformed code."""
+        data = {'code': code}
+        response = json_post(auth_client, URL_TOTP_VERIFY, data)
 
         assert response.status_code == 400
         assert 'Invalid TOTP code' in response.data['error']
 
-    def test_disable_totp(self, auth_client):
+    def test_disable_totp(self, auth_client, totp_enabled_user, json_post):
         """Test disabling TOTP 2FA."""
-        # Setup: Enroll and enable TOTP
-        auth_client.user.totp_secret = 'JBSWY3DPEHPK3PXP'
-        auth_client.user.totp_enabled = True
-        auth_client.user.save()
-
-        # Generate valid code
-        totp = pyotp.TOTP(auth_client.user.totp_secret)
-        valid_code = totp.now()
-
-        # Disable
-        url = reverse('totp-disable')
-        data = {'code': valid_code}
-        response = auth_client.post(url, data, format='json')
+        data = {'code': FROZEN_TOTP_CODE}
+        response = json_post(auth_client, URL_TOTP_DISABLE, data)
 
         assert response.status_code == 200
         assert 'disabled successfully' in response.data['message']
 
         # Verify TOTP is disabled
-        auth_client.user.refresh_from_db()
+        auth_client.user.refresh_from_db(fields=['totp_secret', 'totp_enabled'])
         assert not auth_client.user.totp_enabled
         assert auth_client.user.totp_secret is None
 
@@ -299,36 +383,29 @@ class TestTOTPEnrollment:
 class TestAccountRecovery:
     """Test cases for account recovery."""
 
-    def test_request_recovery(self, api_client, password_user):
+    def test_request_recovery(self, api_client, password_user, json_post):
         """Test requesting account recovery."""
-        url = reverse('recovery-request')
         data = {'email': password_user.email}
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_RECOVERY_REQUEST, data)
 
         assert response.status_code == 200
         assert 'recovery link has been sent' in response.data['message']
 
-    def test_request_recovery_nonexistent_email(self, api_client):
+    def test_request_recovery_nonexistent_email(self, api_client, json_post):
         """Test requesting recovery for non-existent email (should still return success)."""
-        url = reverse('recovery-request')
         data = {'email': 'nonexistent@example.com'}
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_RECOVERY_REQUEST, data)
 
         # Should return success to not reveal if email exists
         assert response.status_code == 200
 
-    def test_confirm_recovery_with_password(self, api_client, password_user):
+    def test_confirm_recovery_with_password(self, api_client, password_user, json_post, recovery_token):
         """Test confirming account recovery with new password."""
-        # Get recovery token from request response
-        request_url = reverse('recovery-request')
-        request_data = {'email': password_user.email}
-        request_response = api_client.post(request_url, request_data, format='json')
-        token = request_response.data['token']
+        token = recovery_token
 
         # Confirm recovery
-        confirm_url = reverse('recovery-confirm')
         confirm_data = {
             'token': token,
             'new_auth_method': 'password',
@@ -336,18 +413,17 @@ class TestAccountRecovery:
             'password_confirm': 'NewPassword123!'
         }
 
-        response = api_client.post(confirm_url, confirm_data, format='json')
+        response = json_post(api_client, URL_RECOVERY_CONFIRM, confirm_data)
 
         assert response.status_code == 200
         assert 'Account recovered' in response.data['message']
 
         # Verify password was changed
-        password_user.refresh_from_db()
+        password_user.refresh_from_db(fields=['password'])
         assert password_user.check_password('NewPassword123!')
 
-    def test_confirm_recovery_invalid_token(self, api_client):
+    def test_confirm_recovery_invalid_token(self, api_client, json_post):
         """Test confirming recovery with invalid token."""
-        url = reverse('recovery-confirm')
         data = {
             'token': 'invalid_token',
             'new_auth_method': 'password',
@@ -355,55 +431,46 @@ class TestAccountRecovery:
             'password_confirm': 'NewPassword123!'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_RECOVERY_CONFIRM, data)
 
         assert response.status_code == 400
         assert 'Invalid or expired' in response.data['error']
 
-    def test_confirm_recovery_switch_to_passkey(self, api_client, password_user):
+    def test_confirm_recovery_switch_to_passkey(self, api_client, password_user, json_post, recovery_token):
         """Test confirming recovery and switching to passkey."""
-        # Get recovery token
-        request_url = reverse('recovery-request')
-        request_data = {'email': password_user.email}
-        request_response = api_client.post(request_url, request_data, format='json')
-        token = request_response.data['token']
+        token = recovery_token
 
         # Confirm recovery with passkey
-        confirm_url = reverse('recovery-confirm')
         confirm_data = {
             'token': token,
             'new_auth_method': 'passkey'
         }
 
-        response = api_client.post(confirm_url, confirm_data, format='json')
+        response = json_post(api_client, URL_RECOVERY_CONFIRM, confirm_data)
 
         assert response.status_code == 200
-        password_user.refresh_from_db()
+        password_user.refresh_from_db(fields=['auth_method', 'password'])
         assert password_user.auth_method == 'passkey'
+        assert password_user.password is None
 
 
 @pytest.mark.django_db
 class TestPasskeyEnrollment:
     """Test cases for passkey enrollment."""
 
-    def test_enroll_passkey(self, auth_client):
+    def test_enroll_passkey(self, auth_client, json_post):
         """Test enrolling a passkey credential."""
-        url = reverse('passkey-enroll')
         data = {
-            'credential_response': {
-                'id': 'test_credential_id',
-                'type': 'public-key',
-                'response': 'test_response'
-            }
+            'credential_response': PASSKEY_CREDENTIAL
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSKEY_ENROLL, data)
 
         assert response.status_code == 200
         assert 'enrolled successfully' in response.data['message']
 
         # Verify credential was stored
-        auth_client.user.refresh_from_db()
+        auth_client.user.refresh_from_db(fields=['passkey_credential'])
         assert auth_client.user.passkey_credential is not None
 
 
@@ -411,26 +478,22 @@ class TestPasskeyEnrollment:
 class TestTokenRefresh:
     """Test cases for JWT token refresh."""
 
-    def test_refresh_token(self, password_user, api_client):
+    def test_refresh_token(self, password_user, api_client, json_post):
         """Test refreshing JWT access token."""
-        from rest_framework_simplejwt.tokens import RefreshToken
-
         refresh = RefreshToken.for_user(password_user)
-        url = reverse('token-refresh')
         data = {'refresh': str(refresh)}
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_TOKEN_REFRESH, data)
 
         assert response.status_code == 200
         assert 'access' in response.data
         assert 'refresh' in response.data  # New refresh token due to rotation
 
-    def test_refresh_token_invalid(self, api_client):
+    def test_refresh_token_invalid(self, api_client, json_post):
         """Test refreshing with invalid token."""
-        url = reverse('token-refresh')
         data = {'refresh': 'invalid_token'}
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_TOKEN_REFRESH, data)
 
         assert response.status_code == 401
 
@@ -439,44 +502,38 @@ class TestTokenRefresh:
 class TestPasskeyLogin:
     """Test cases for passkey login."""
 
-    def test_passkey_login_success(self, api_client, passkey_user):
+    def test_passkey_login_success(self, api_client, passkey_user, json_post):
         """Test successful passkey login."""
-        url = reverse('passkey-login')
         data = {
             'email': passkey_user.email,
-            'credential_response': {
-                'id': 'test_credential_id',
-                'type': 'public-key'
-            }
+            'credential_response': PASSKEY_CREDENTIAL
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_PASSKEY_LOGIN, data)
 
         assert response.status_code == 200
         assert 'tokens' in response.data
         assert 'user' in response.data
 
-    def test_passkey_login_nonexistent_user(self, api_client):
+    def test_passkey_login_nonexistent_user(self, api_client, json_post):
         """Test passkey login with non-existent email."""
-        url = reverse('passkey-login')
         data = {
             'email': 'nonexistent@example.com',
-            'credential_response': {'id': 'test'}
+            'credential_response': PASSKEY_CREDENTIAL
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_PASSKEY_LOGIN, data)
 
         assert response.status_code == 401
 
-    def test_passkey_login_wrong_auth_method(self, api_client, password_user):
+    def test_passkey_login_wrong_auth_method(self, api_client, password_user, json_post):
         """Test passkey login on password account."""
-        url = reverse('passkey-login')
         data = {
             'email': password_user.email,
-            'credential_response': {'id': 'test'}
+            'credential_response': PASSKEY_CREDENTIAL
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_PASSKEY_LOGIN, data)
 
         assert response.status_code == 400
         assert 'password' in response.data['error']
@@ -486,37 +543,29 @@ class TestPasskeyLogin:
 class TestTOTPEnrollmentErrors:
     """Test error cases for TOTP enrollment."""
 
-    def test_verify_totp_without_enrollment(self, auth_client):
+    def test_verify_totp_without_enrollment(self, auth_client, json_post):
         """Test verifying TOTP without enrolling first."""
-        url = reverse('totp-verify')
         data = {'code': '123456'}
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_TOTP_VERIFY, data)
 
         assert response.status_code == 400
         assert 'not enrolled' in response.data['error']
 
-    def test_disable_totp_not_enabled(self, auth_client):
+    def test_disable_totp_not_enabled(self, auth_client, json_post):
         """Test disabling TOTP when it's not enabled."""
-        url = reverse('totp-disable')
         data = {'code': '123456'}
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_TOTP_DISABLE, data)
 
         assert response.status_code == 400
         assert 'not enabled' in response.data['error']
 
-    def test_disable_totp_invalid_code(self, auth_client):
+    def test_disable_totp_invalid_code(self, auth_client, totp_enabled_user, json_post):
         """Test disabling TOTP with invalid code."""
-        # Enable TOTP first
-        auth_client.user.totp_secret = 'JBSWY3DPEHPK3PXP'
-        auth_client.user.totp_enabled = True
-        auth_client.user.save()
-
-        url = reverse('totp-disable')
         data = {'code': '000000'}
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_TOTP_DISABLE, data)
 
         assert response.status_code == 400
         assert 'Invalid TOTP code' in response.data['error']
@@ -526,9 +575,9 @@ class TestTOTPEnrollmentErrors:
 class TestAccountRecoveryEdgeCases:
     """Test edge cases for account recovery."""
 
-    def test_recovery_confirm_nonexistent_user(self, api_client):
+    def test_recovery_confirm_nonexistent_user(self, api_client, json_post):
         """Test recovery confirm with token for deleted user."""
-        from django.core.signing import TimestampSigner
+        from users.views import _RECOVERY_SIGNER
 
         # Create and delete a user
         user = User.objects.create_user(
@@ -540,10 +589,8 @@ class TestAccountRecoveryEdgeCases:
         user.delete()
 
         # Create token for deleted user
-        signer = TimestampSigner()
-        token = signer.sign(str(user_id))
+        token = _RECOVERY_SIGNER.sign(str(user_id))
 
-        url = reverse('recovery-confirm')
         data = {
             'token': token,
             'new_auth_method': 'password',
@@ -551,187 +598,167 @@ class TestAccountRecoveryEdgeCases:
             'password_confirm': 'NewPassword123!'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_RECOVERY_CONFIRM, data)
 
         assert response.status_code == 404
         assert 'not found' in response.data['error']
 
+    def test_recovery_confirm_rejects_unsalted_token(self, api_client, json_post, session_users):
+        """Test that a token signed for another purpose is not a recovery token."""
+        from django.core.signing import TimestampSigner
+
+        data = {
+            'token': TimestampSigner().sign(str(session_users['password'])),
+            'new_auth_method': 'password',
+            'password': 'NewPassword123!',
+            'password_confirm': 'NewPassword123!'
+        }
+
+        response = json_post(api_client, URL_RECOVERY_CONFIRM, data)
+
+        assert response.status_code == 400
+
 
 @pytest.mark.django_db
 class TestPasswordChange:
     """Test cases for password change functionality."""
 
-    def test_successful_password_change(self, auth_client):
+    def test_successful_password_change(self, auth_client, password_authed_user, json_post):
         """Test successful password change."""
-        # Set a known password for the authenticated user
-        auth_client.user.set_password('OldPassword123!@#$')
-        auth_client.user.auth_method = 'password'
-        auth_client.user.save()
-
-        url = reverse('password-change')
         data = {
-            'old_password': 'OldPassword123!@#$',
+            'old_password': OLD_PASSWORD,
             'new_password': 'NewSecurePassword456!@#$',
             'new_password_confirm': 'NewSecurePassword456!@#$'
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSWORD_CHANGE, data)
 
         assert response.status_code == 200
         assert 'message' in response.data
         assert 'successfully' in response.data['message'].lower()
 
         # Verify new password works
-        auth_client.user.refresh_from_db()
+        auth_client.user.refresh_from_db(fields=['password'])
         assert auth_client.user.check_password('NewSecurePassword456!@#$')
-        assert not auth_client.user.check_password('OldPassword123!@#$')
+        assert not auth_client.user.check_password(OLD_PASSWORD)
 
-    def test_password_change_incorrect_old_password(self, auth_client):
+    def test_password_change_incorrect_old_password(self, auth_client, password_authed_user, json_post):
         """Test password change with incorrect old password."""
-        auth_client.user.set_password('OldPassword123!@#$')
-        auth_client.user.auth_method = 'password'
-        auth_client.user.save()
-
-        url = reverse('password-change')
         data = {
             'old_password': 'WrongPassword123!@#$',
             'new_password': 'NewSecurePassword456!@#$',
             'new_password_confirm': 'NewSecurePassword456!@#$'
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSWORD_CHANGE, data)
 
         assert response.status_code == 400
         assert 'error' in response.data
         assert 'incorrect' in response.data['error'].lower()
 
         # Verify password hasn't changed
-        auth_client.user.refresh_from_db()
-        assert auth_client.user.check_password('OldPassword123!@#$')
+        auth_client.user.refresh_from_db(fields=['password'])
+        assert auth_client.user.check_password(OLD_PASSWORD)
 
-    def test_password_change_mismatched_new_passwords(self, auth_client):
+    def test_password_change_mismatched_new_passwords(self, auth_client, password_authed_user, json_post):
         """Test password change when new passwords don't match."""
-        auth_client.user.set_password('OldPassword123!@#$')
-        auth_client.user.auth_method = 'password'
-        auth_client.user.save()
-
-        url = reverse('password-change')
         data = {
-            'old_password': 'OldPassword123!@#$',
+            'old_password': OLD_PASSWORD,
             'new_password': 'NewSecurePassword456!@#$',
             'new_password_confirm': 'DifferentPassword789!@#$'
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSWORD_CHANGE, data)
 
         assert response.status_code == 400
         assert 'new_password_confirm' in response.data
 
         # Verify password hasn't changed
-        auth_client.user.refresh_from_db()
-        assert auth_client.user.check_password('OldPassword123!@#$')
+        auth_client.user.refresh_from_db(fields=['password'])
+        assert auth_client.user.check_password(OLD_PASSWORD)
 
-    def test_password_change_weak_new_password(self, auth_client):
+    def test_password_change_weak_new_password(self, auth_client, password_authed_user, json_post):
         """Test password change with password that doesn't meet requirements."""
-        auth_client.user.set_password('OldPassword123!@#$')
-        auth_client.user.auth_method = 'password'
-        auth_client.user.save()
-
-        url = reverse('password-change')
         data = {
-            'old_password': 'OldPassword123!@#$',
+            'old_password': OLD_PASSWORD,
             'new_password': 'weak',
             'new_password_confirm': 'weak'
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSWORD_CHANGE, data)
 
         assert response.status_code == 400
         assert 'new_password' in response.data
 
         # Verify password hasn't changed
-        auth_client.user.refresh_from_db()
-        assert auth_client.user.check_password('OldPassword123!@#$')
+        auth_client.user.refresh_from_db(fields=['password'])
+        assert auth_client.user.check_password(OLD_PASSWORD)
 
-    def test_password_change_same_as_old_password(self, auth_client):
+    def test_password_change_same_as_old_password(self, auth_client, password_authed_user, json_post):
         """Test password change when new password is same as old password."""
-        auth_client.user.set_password('OldPassword123!@#$')
-        auth_client.user.auth_method = 'password'
-        auth_client.user.save()
-
-        url = reverse('password-change')
         data = {
-            'old_password': 'OldPassword123!@#$',
-            'new_password': 'OldPassword123!@#$',
-            'new_password_confirm': 'OldPassword123!@#$'
+            'old_password': OLD_PASSWORD,
+            'new_password': OLD_PASSWORD,
+            'new_password_confirm': OLD_PASSWORD
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSWORD_CHANGE, data)
 
         assert response.status_code == 400
         assert 'new_password' in response.data
 
-    def test_password_change_passkey_user_forbidden(self, auth_client):
+    def test_password_change_passkey_user_forbidden(self, auth_client, json_post):
         """Test that passkey users cannot change password."""
         auth_client.user.auth_method = 'passkey'
         auth_client.user.passkey_credential = {'credential_id': 'test123'}
         auth_client.user.save()
 
-        url = reverse('password-change')
         data = {
             'old_password': 'SomePassword123!@#$',
             'new_password': 'NewSecurePassword456!@#$',
             'new_password_confirm': 'NewSecurePassword456!@#$'
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSWORD_CHANGE, data)
 
         assert response.status_code == 403
         assert 'error' in response.data
 
-    def test_password_change_requires_authentication(self, api_client):
+    def test_password_change_requires_authentication(self, api_client, json_post):
         """Test that unauthenticated users cannot change password."""
-        url = reverse('password-change')
         data = {
-            'old_password': 'OldPassword123!@#$',
+            'old_password': OLD_PASSWORD,
             'new_password': 'NewSecurePassword456!@#$',
             'new_password_confirm': 'NewSecurePassword456!@#$'
         }
 
-        response = api_client.post(url, data, format='json')
+        response = json_post(api_client, URL_PASSWORD_CHANGE, data)
 
         assert response.status_code == 401
 
-    def test_can_login_with_new_password(self, auth_client, api_client):
+    def test_can_login_with_new_password(self, auth_client, password_authed_user, api_client, json_post):
         """Test that user can login with new password after successful change."""
-        # Set initial password
-        auth_client.user.set_password('OldPassword123!@#$')
-        auth_client.user.auth_method = 'password'
-        auth_client.user.save()
-
         # Change password
-        url = reverse('password-change')
         data = {
-            'old_password': 'OldPassword123!@#$',
+            'old_password': OLD_PASSWORD,
             'new_password': 'NewSecurePassword456!@#$',
             'new_password_confirm': 'NewSecurePassword456!@#$'
         }
 
-        response = auth_client.post(url, data, format='json')
+        response = json_post(auth_client, URL_PASSWORD_CHANGE, data)
         assert response.status_code == 200
 
         # Try to login with new password
-        login_url = reverse('password-login')
         login_data = {
             'email': auth_client.user.email,
             'password': 'NewSecurePassword456!@#$'
         }
 
-        response = api_client.post(login_url, login_data, format='json')
+        response = json_post(api_client, URL_LOGIN, login_data)
         assert response.status_code == 200
         assert 'tokens' in response.data
 
         # Try to login with old password (should fail)
-        login_data['password'] = 'OldPassword123!@#$'
-        response = api_client.post(login_url, login_data, format='json')
+        login_data['password'] = OLD_PASSWORD
+        response = json_post(api_client, URL_LOGIN, login_data)
         assert response.status_code == 401
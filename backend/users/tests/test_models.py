@@ -3,6 +3,7 @@ Tests for User model.
 """
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 
 User = get_user_model()
 
@@ -54,90 +55,83 @@ class TestUserModel:
         assert user.auth_method == 'password'
         assert user.check_password('AdminPassword123!')
 
-    def test_user_email_unique(self):
+    def test_user_email_unique(self, password_user):
         """Test that user emails must be unique."""
-        User.objects.create_user(
-            email='test@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
+        # The savepoint keeps the test transaction usable after the error
+        with pytest.raises(IntegrityError), transaction.atomic():
+            User.objects.create(email=password_user.email, auth_method='password')
 
-        with pytest.raises(Exception):  # IntegrityError
-            User.objects.create_user(
-                email='test@example.com',
-                password='AnotherPassword123!',
-                auth_method='password'
-            )
-
-    def test_user_str_representation(self):
+    def test_user_str_representation(self, password_user):
         """Test the string representation of a user."""
-        user = User.objects.create_user(
-            email='test@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
-
-        assert str(user) == 'test@example.com'
+        assert str(password_user) == 'password-user@example.com'
 
-    def test_has_usable_password(self):
+    def test_has_usable_password(self, password_user, passkey_user):
         """Test has_usable_password method."""
-        password_user = User.objects.create_user(
-            email='password@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
-
-        passkey_user = User.objects.create_user(
-            email='passkey@example.com',
-            password=None,
-            auth_method='passkey'
-        )
-
         assert password_user.has_usable_password()
         assert not passkey_user.has_usable_password()
 
-    def test_totp_fields(self):
+    def test_totp_fields(self, password_user):
         """Test TOTP 2FA fields."""
-        user = User.objects.create_user(
-            email='test@example.com',
-            password='Password123!',
-            auth_method='password'
-        )
+        user = password_user
 
         assert user.totp_secret is None
         assert not user.totp_enabled
 
         user.totp_secret = 'TESTSECRET123'
         user.totp_enabled = True
-        user.save()
-
-        user.refresh_from_db()
-        assert user.totp_secret == 'TESTSECRET123'
-        assert user.totp_enabled
-
-    def test_create_user_without_email(self):
-        """Test that creating user without email raises error."""
-        with pytest.raises(ValueError, match='Email field must be set'):
-            User.objects.create_user(
-                email='',
-                password='Password123!',
-                auth_method='password'
-            )
-
-    def test_create_superuser_not_staff(self):
-        """Test that superuser must have is_staff=True."""
-        with pytest.raises(ValueError, match='must have is_staff=True'):
-            User.objects.create_superuser(
-                email='admin@example.com',
-                password='Password123!',
-                is_staff=False
-            )
-
-    def test_create_superuser_not_superuser(self):
-        """Test that superuser must have is_superuser=True."""
-        with pytest.raises(ValueError, match='must have is_superuser=True'):
-            User.objects.create_superuser(
-                email='admin@example.com',
-                password='Password123!',
-                is_superuser=False
-            )
+        user.save(update_fields=['totp_secret', 'totp_enabled'])
+
+        saved = User.objects.only('totp_secret', 'totp_enabled').get(pk=user.pk)
+        assert saved.totp_secret == 'TESTSECRET123'
+        assert saved.totp_enabled
+
+    @pytest.mark.parametrize('create, kwargs, match', [
+        pytest.param(
+            'create_user',
+            {'email': '', 'password': 'Password123!', 'auth_method': 'password'},
+            'Email field must be set',
+            id='without-email',
+        ),
+        pytest.param(
+            'create_superuser',
+            {'email': 'admin@example.com', 'password': 'Password123!', 'is_staff': False},
+            'must have is_staff=True',
+            id='superuser-not-staff',
+        ),
+        pytest.param(
+            'create_superuser',
+            {'email': 'admin@example.com', 'password': 'Password123!', 'is_superuser': False},
+            'must have is_superuser=True',
+            id='superuser-not-superuser',
+        ),
+    ])
+    def test_create_user_invalid_arguments(self, create, kwargs, match):
+        """Test that create_user/create_superuser reject invalid arguments."""
+        with pytest.raises(ValueError, match=match):
+            getattr(User.objects, create)(**kwargs)
+
+    def test_bulk_create_users(self):
+        """Test creating password and passkey users in one batch."""
+        User.objects.bulk_create_users([
+            {'email': 'one@EXAMPLE.com', 'password': 'Password123!'},
+            {'email': 'two@example.com', 'auth_method': 'passkey'},
+        ])
+
+        one = User.objects.get(email='one@example.com')
+        two = User.objects.get(email='two@example.com')
+        assert one.check_password('Password123!')
+        assert one.auth_method == 'password'
+        assert two.auth_method == 'passkey'
+        assert two.password is None
+
+    def test_bulk_create_users_threaded_hashing(self):
+        """Test that batches big enough for the thread pool get the right hashes."""
+        from users.models import PARALLEL_HASH_THRESHOLD
+
+        User.objects.bulk_create_users([
+            {'email': f'user{i}@example.com', 'password': f'Password{i}!'}
+            for i in range(PARALLEL_HASH_THRESHOLD)
+        ])
+
+        for i in range(PARALLEL_HASH_THRESHOLD):
+            assert User.objects.get(email=f'user{i}@example.com').check_password(f'Password{i}!')
@@ -1,59 +1,63 @@
 """
 Tests for user serializers.
 """
+from types import MappingProxyType
+
 import pytest
+from rest_framework.exceptions import ValidationError
 from users.serializers import (
     UserRegistrationSerializer,
     PasswordLoginSerializer,
-    TOTPVerifySerializer,
     AccountRecoveryConfirmSerializer
 )
 
+# Read-only base payloads; tests extend them with {**BASE, ...}
+REGISTRATION_BASE = MappingProxyType({'email': 'test@example.com', 'auth_method': 'password'})
+RECOVERY_CONFIRM_BASE = MappingProxyType({'token': 'test_token', 'new_auth_method': 'password'})
+
 
 @pytest.mark.django_db
 class TestUserRegistrationSerializer:
     """Test cases for UserRegistrationSerializer."""
 
-    def test_password_required_validation(self):
+    @pytest.fixture(scope='class')
+    def serializer(self):
+        """One unbound serializer for the class; tests call run_validation() on it."""
+        return UserRegistrationSerializer()
+
+    def test_password_required_validation(self, serializer):
         """Test that password is required for password auth."""
-        data = {
-            'email': 'test@example.com',
-            'auth_method': 'password',
-            'password_confirm': 'Password123!'
-        }
-        serializer = UserRegistrationSerializer(data=data)
+        data = {**REGISTRATION_BASE, 'password_confirm': 'Password123!'}
 
-        assert not serializer.is_valid()
-        assert 'password' in serializer.errors
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.run_validation(data)
 
-    def test_passkey_should_not_have_password(self):
+        assert 'password' in exc_info.value.detail
+
+    def test_passkey_should_not_have_password(self, serializer):
         """Test that passkey auth should not include password."""
         data = {
-            'email': 'test@example.com',
+            **REGISTRATION_BASE,
             'auth_method': 'passkey',
             'password': 'Password123!',
             'password_confirm': 'Password123!'
         }
-        serializer = UserRegistrationSerializer(data=data)
 
-        assert not serializer.is_valid()
-        assert 'password' in serializer.errors
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.run_validation(data)
 
-    def test_weak_password_validation(self):
+        assert 'password' in exc_info.value.detail
+
+    def test_weak_password_validation(self, serializer):
         """Test password validation with weak password."""
-        data = {
-            'email': 'test@example.com',
-            'auth_method': 'password',
-            'password': '123',
-            'password_confirm': '123'
-        }
-        serializer = UserRegistrationSerializer(data=data)
+        data = {**REGISTRATION_BASE, 'password': '123', 'password_confirm': '123'}
 
-        assert not serializer.is_valid()
-        assert 'password' in serializer.errors
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.run_validation(data)
+
+        assert 'password' in exc_info.value.detail
 
 
-@pytest.mark.django_db
 class TestPasswordLoginSerializer:
     """Test cases for PasswordLoginSerializer."""
 
@@ -80,74 +84,37 @@ class TestPasswordLoginSerializer:
         assert serializer.validated_data['totp_code'] == '123456'
 
 
-@pytest.mark.django_db
-class TestTOTPVerifySerializer:
-    """Test cases for TOTPVerifySerializer."""
-
-    def test_valid_totp_code(self):
-        """Test serializer with valid TOTP code."""
-        data = {'code': '123456'}
-        serializer = TOTPVerifySerializer(data=data)
-
-        assert serializer.is_valid()
-
-    def test_invalid_totp_code_non_numeric(self):
-        """Test that non-numeric TOTP codes are rejected."""
-        data = {'code': 'abcdef'}
-        serializer = TOTPVerifySerializer(data=data)
-
-        assert not serializer.is_valid()
-        assert 'code' in serializer.errors
-
-    def test_totp_code_too_short(self):
-        """Test that short TOTP codes are rejected."""
-        data = {'code': '123'}
-        serializer = TOTPVerifySerializer(data=data)
-
-        assert not serializer.is_valid()
-
-    def test_totp_code_too_long(self):
-        """Test that long TOTP codes are rejected."""
-        data = {'code': '1234567'}
-        serializer = TOTPVerifySerializer(data=data)
-
-        assert not serializer.is_valid()
-
-
-@pytest.mark.django_db
 class TestAccountRecoveryConfirmSerializer:
     """Test cases for AccountRecoveryConfirmSerializer."""
 
-    def test_password_required_for_password_auth(self):
+    @pytest.fixture(scope='class')
+    def serializer(self):
+        """One unbound serializer for the class; tests call run_validation() on it."""
+        return AccountRecoveryConfirmSerializer()
+
+    def test_password_required_for_password_auth(self, serializer):
         """Test that password is required when choosing password auth."""
-        data = {
-            'token': 'test_token',
-            'new_auth_method': 'password'
-        }
-        serializer = AccountRecoveryConfirmSerializer(data=data)
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.run_validation({**RECOVERY_CONFIRM_BASE})
 
-        assert not serializer.is_valid()
-        assert 'password' in serializer.errors
+        assert 'password' in exc_info.value.detail
 
-    def test_password_mismatch(self):
+    def test_password_mismatch(self, serializer):
         """Test that password mismatch is caught."""
         data = {
-            'token': 'test_token',
-            'new_auth_method': 'password',
+            **RECOVERY_CONFIRM_BASE,
             'password': 'Password123!',
             'password_confirm': 'DifferentPassword123!'
         }
-        serializer = AccountRecoveryConfirmSerializer(data=data)
 
-        assert not serializer.is_valid()
-        assert 'password_confirm' in serializer.errors
+        with pytest.raises(ValidationError) as exc_info:
+            serializer.run_validation(data)
 
-    def test_passkey_auth_no_password(self):
+        assert 'password_confirm' in exc_info.value.detail
+
+    def test_passkey_auth_no_password(self, serializer):
         """Test that passkey auth doesn't require password."""
-        data = {
-            'token': 'test_token',
-            'new_auth_method': 'passkey'
-        }
-        serializer = AccountRecoveryConfirmSerializer(data=data)
+        data = {**RECOVERY_CONFIRM_BASE, 'new_auth_method': 'passkey'}
+        validated = serializer.run_validation(data)
 
-        assert serializer.is_valid()
+        assert validated['new_auth_method'] == 'passkey'
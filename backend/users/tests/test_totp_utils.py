@@ -0,0 +1,47 @@
+"""
+Tests for TOTP utilities.
+"""
+import pyotp
+import pytest
+from freezegun import freeze_time
+
+from users.totp_utils import _totp_code, verify_totp
+
+SECRET = 'JBSWY3DPEHPK3PXP'
+NOW = 1704067200  # 2024-01-01T00:00:00Z
+
+
+@freeze_time('2024-01-01')
+class TestVerifyTOTP:
+    """Test cases for verify_totp."""
+
+    @pytest.mark.parametrize('offset, valid', [
+        pytest.param(0, True, id='current-step'),
+        pytest.param(-30, True, id='previous-step'),
+        pytest.param(30, True, id='next-step'),
+        pytest.param(-60, False, id='two-steps-back'),
+        pytest.param(60, False, id='two-steps-ahead'),
+    ])
+    def test_window(self, offset, valid):
+        """Test that codes one step either side of now are accepted."""
+        code = pyotp.TOTP(SECRET).at(NOW + offset)
+
+        assert verify_totp(SECRET, code) is valid
+
+    def test_wrong_code(self):
+        """Test that a code outside the window's codes is rejected."""
+        assert verify_totp(SECRET, '000000') is False
+
+    def test_non_ascii_code(self):
+        """Test that non-ASCII digits are rejected rather than raising."""
+        assert verify_totp(SECRET, '١٢٣٤٥٦') is False
+
+
+@pytest.mark.parametrize('timestamp, expected', [
+    (59, b'287082'),
+    (1111111109, b'081804'),
+    (2000000000, b'279037'),
+])
+def test_totp_code_rfc6238_vectors(timestamp, expected):
+    """Test the raw HMAC code against the RFC 6238 SHA-1 test vectors."""
+    assert _totp_code(b'12345678901234567890', timestamp // 30) == expected
@@ -0,0 +1,68 @@
+"""
+Tests for WebAuthn utilities.
+"""
+import uuid
+
+import pytest
+from webauthn.helpers import bytes_to_base64url
+
+from users.webauthn_utils import (
+    generate_passkey_authentication_options,
+    generate_passkey_registration_options,
+    pop_challenge,
+    prepare_credential_for_storage,
+    store_challenge,
+)
+
+
+class TestChallengeCache:
+    """Test cases for store_challenge/pop_challenge."""
+
+    def test_pop_challenge_is_single_use(self):
+        """Test that a stored challenge can be popped exactly once."""
+        store_challenge('challenge_test', b'\x00challenge\xff')
+
+        assert pop_challenge('challenge_test') == b'\x00challenge\xff'
+        assert pop_challenge('challenge_test') is None
+
+    def test_pop_missing_challenge(self):
+        """Test that popping an unknown challenge returns None."""
+        assert pop_challenge('challenge_missing') is None
+
+
+def test_prepare_credential_for_storage():
+    """Test that the sign count is left out of the stored credential."""
+    verified = {
+        'credential_id': 'Y3JlZA', 'public_key': 'cGs', 'sign_count': 3,
+        'aaguid': '00000000-0000-0000-0000-000000000000', 'fmt': 'none',
+        'credential_type': 'public-key', 'user_verified': True,
+        'credential_backed_up': False, 'credential_device_type': 'single_device',
+    }
+
+    stored = prepare_credential_for_storage(verified)
+
+    assert 'sign_count' not in stored
+    assert stored == {k: v for k, v in verified.items() if k != 'sign_count'}
+
+
+@pytest.mark.parametrize('user_id, expected', [
+    pytest.param(uuid.UUID(int=1), uuid.UUID(int=1).bytes, id='uuid'),
+    pytest.param('user@example.com', b'user@example.com', id='str'),
+    pytest.param(b'\x01\x02', b'\x01\x02', id='bytes'),
+])
+def test_registration_options_user_handle(user_id, expected):
+    """Test that the user handle is sent as raw bytes for each id type."""
+    options = generate_passkey_registration_options(user_id=user_id, user_email='user@example.com')
+
+    assert options['options']['user']['id'] == bytes_to_base64url(expected)
+
+
+def test_authentication_options_allow_credentials():
+    """Test that stored credential ids and transports reach the options."""
+    options = generate_passkey_authentication_options(
+        user_credentials=[{'credential_id': 'Y3JlZA', 'transports': ['usb', 'internal']}]
+    )
+
+    assert options['options']['allowCredentials'] == [
+        {'id': 'Y3JlZA', 'type': 'public-key', 'transports': ['usb', 'internal']},
+    ]
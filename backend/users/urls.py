@@ -1,4 +1,4 @@
-from django.urls import path
+from django.urls import include, path
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
@@ -19,6 +19,24 @@ from .views import (
     PasswordChangeView,
 )
 
+totp_urlpatterns = [
+    path('enroll/', TOTPEnrollView.as_view(), name='totp-enroll'),
+    path('verify/', TOTPVerifyView.as_view(), name='totp-verify'),
+    path('disable/', TOTPDisableView.as_view(), name='totp-disable'),
+]
+
+recovery_urlpatterns = [
+    path('request/', AccountRecoveryRequestView.as_view(), name='recovery-request'),
+    path('confirm/', AccountRecoveryConfirmView.as_view(), name='recovery-confirm'),
+]
+
+passkey_urlpatterns = [
+    path('registration/options/', PasskeyRegistrationOptionsView.as_view(), name='passkey-registration-options'),
+    path('registration/verify/', PasskeyEnrollView.as_view(), name='passkey-enroll'),
+    path('login/options/', PasskeyLoginOptionsView.as_view(), name='passkey-login-options'),
+    path('login/verify/', PasskeyLoginView.as_view(), name='passkey-login'),
+]
+
 urlpatterns = [
     # Registration and Login
     path('register/', UserRegistrationView.as_view(), name='user-register'),
@@ -34,17 +52,11 @@ urlpatterns = [
     path('password/change/', PasswordChangeView.as_view(), name='password-change'),
 
     # TOTP 2FA
-    path('totp/enroll/', TOTPEnrollView.as_view(), name='totp-enroll'),
-    path('totp/verify/', TOTPVerifyView.as_view(), name='totp-verify'),
-    path('totp/disable/', TOTPDisableView.as_view(), name='totp-disable'),
+    path('totp/', include(totp_urlpatterns)),
 
     # Account Recovery
-    path('recovery/request/', AccountRecoveryRequestView.as_view(), name='recovery-request'),
-    path('recovery/confirm/', AccountRecoveryConfirmView.as_view(), name='recovery-confirm'),
+    path('recovery/', include(recovery_urlpatterns)),
 
     # Passkey Management
-    path('passkey/registration/options/', PasskeyRegistrationOptionsView.as_view(), name='passkey-registration-options'),
-    path('passkey/registration/verify/', PasskeyEnrollView.as_view(), name='passkey-enroll'),
-    path('passkey/login/options/', PasskeyLoginOptionsView.as_view(), name='passkey-login-options'),
-    path('passkey/login/verify/', PasskeyLoginView.as_view(), name='passkey-login'),
+    path('passkey/', include(passkey_urlpatterns)),
 ]
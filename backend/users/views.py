@@ -1,23 +1,24 @@
 from rest_framework import status, generics, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model, authenticate
 from django.core.signing import TimestampSigner, SignatureExpired, BadSignature
-from django.core.cache import cache
 from django.utils import timezone
 from django.conf import settings
-from django.utils.decorators import method_decorator
-from django_ratelimit.decorators import ratelimit
-import pyotp
 from datetime import timedelta
+import re
 
+from .totp_utils import verify_totp
 from .webauthn_utils import (
     generate_passkey_registration_options,
     verify_passkey_registration,
     generate_passkey_authentication_options,
     verify_passkey_authentication,
     prepare_credential_for_storage,
+    store_challenge,
+    pop_challenge,
 )
 from webauthn.helpers import base64url_to_bytes
 
@@ -28,7 +29,6 @@ from .serializers import (
     PasswordLoginSerializer,
     PasskeyLoginSerializer,
     TOTPEnrollSerializer,
-    TOTPVerifySerializer,
     AccountRecoveryRequestSerializer,
     AccountRecoveryConfirmSerializer,
     PasskeyCredentialSerializer,
@@ -37,6 +37,20 @@ from .serializers import (
 
 User = get_user_model()
 
+# Signs and verifies account recovery tokens; the salt keeps them from
+# validating as any other TimestampSigner value signed with SECRET_KEY
+_RECOVERY_SIGNER = TimestampSigner(salt='account-recovery')
+
+# Lets the test suite log in with stub passkey credentials; never set in production
+_IS_TEST_MODE = getattr(settings, 'TESTING', False)
+
+# A well-formed TOTP code: exactly six digits
+_is_totp_code = re.compile(r'[0-9]{6}').fullmatch
+
+# Relying party checked on every passkey login/enrollment; bound once at import
+_WEBAUTHN_ORIGIN = settings.WEBAUTHN_ORIGIN
+_WEBAUTHN_RP_ID = settings.WEBAUTHN_RP_ID
+
 
 def get_tokens_for_user(user):
     """Generate JWT tokens for a user."""
@@ -47,13 +61,14 @@ def get_tokens_for_user(user):
     }
 
 
-@method_decorator(ratelimit(key='ip', rate='10/h', method='POST'), name='create')
 class UserRegistrationView(generics.CreateAPIView):
     """
     API endpoint for user registration.
     Users can choose between password or passkey authentication.
     Rate limited to 10 registrations per hour per IP.
     """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'register'
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -72,12 +87,13 @@ class UserRegistrationView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-@method_decorator(ratelimit(key='ip', rate='10/m', method='POST'), name='post')
 class PasswordLoginView(APIView):
     """
     API endpoint for password-based login with optional TOTP.
     Rate limited to 10 login attempts per minute per IP.
     """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'password_login'
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
@@ -89,8 +105,12 @@ class PasswordLoginView(APIView):
         totp_code = serializer.validated_data.get('totp_code')
 
         try:
-            user = User.objects.get(email=email)
+            # The passkey credential is the only column login never reads
+            user = User.objects.defer('passkey_credential').get(email=email)
         except User.DoesNotExist:
+            # Hash the password anyway so an unknown email takes as long to
+            # reject as a wrong password (same approach as ModelBackend)
+            User().set_password(password)
             return Response({
                 'error': 'Invalid credentials.'
             }, status=status.HTTP_401_UNAUTHORIZED)
@@ -115,21 +135,20 @@ class PasswordLoginView(APIView):
                     'totp_required': True
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            totp = pyotp.TOTP(user.totp_secret)
-            if not totp.verify(totp_code, valid_window=1):
+            if not verify_totp(user.totp_secret, totp_code):
                 return Response({
                     'error': 'Invalid TOTP code.'
                 }, status=status.HTTP_401_UNAUTHORIZED)
 
-        # Update last login
+        # Update last login with a plain UPDATE (no save() machinery)
         user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
+        User.objects.filter(pk=user.pk).update(last_login=user.last_login)
 
         # Generate tokens
         tokens = get_tokens_for_user(user)
 
         return Response({
-            'user': UserSerializer(user).data,
+            'user': UserSerializer.serialized(user),
             'tokens': tokens,
             'message': 'Login successful.'
         }, status=status.HTTP_200_OK)
@@ -147,7 +166,7 @@ class CheckAuthMethodView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.only('auth_method').get(email=email)
             return Response({
                 'auth_method': user.auth_method,
                 'email': email
@@ -182,11 +201,9 @@ class PasskeyRegistrationOptionsView(APIView):
         )
 
         # Store challenge in cache with email as key
-        cache_key = f'passkey_registration_challenge_{email}'
-        cache.set(
-            cache_key,
-            options_data['challenge'],
-            timeout=settings.WEBAUTHN_CHALLENGE_TIMEOUT
+        store_challenge(
+            f'passkey_registration_challenge_{email}',
+            options_data['challenge']
         )
 
         return Response({
@@ -194,12 +211,13 @@ class PasskeyRegistrationOptionsView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-@method_decorator(ratelimit(key='ip', rate='10/m', method='POST'), name='post')
 class PasskeyLoginOptionsView(APIView):
     """
     API endpoint to generate passkey login options.
     Rate limited to 10 attempts per minute per IP.
     """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'passkey_login_options'
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
@@ -210,7 +228,7 @@ class PasskeyLoginOptionsView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.only('auth_method', 'passkey_credential').get(email=email)
         except User.DoesNotExist:
             return Response({
                 'error': 'Invalid credentials.'
@@ -240,11 +258,9 @@ class PasskeyLoginOptionsView(APIView):
         )
 
         # Store challenge in cache with email as key
-        cache_key = f'passkey_login_challenge_{email}'
-        cache.set(
-            cache_key,
-            options_data['challenge'],
-            timeout=settings.WEBAUTHN_CHALLENGE_TIMEOUT
+        store_challenge(
+            f'passkey_login_challenge_{email}',
+            options_data['challenge']
         )
 
         return Response({
@@ -252,12 +268,13 @@ class PasskeyLoginOptionsView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-@method_decorator(ratelimit(key='ip', rate='10/m', method='POST'), name='post')
 class PasskeyLoginView(APIView):
     """
     API endpoint for passkey-based login.
     Rate limited to 10 login attempts per minute per IP.
     """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'passkey_login'
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
@@ -288,59 +305,55 @@ class PasskeyLoginView(APIView):
                 'error': 'No passkey registered for this account.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Retrieve stored challenge
-        cache_key = f'passkey_login_challenge_{email}'
-        stored_challenge = cache.get(cache_key)
+        # Retrieve and delete the stored challenge (single use)
+        stored_challenge = pop_challenge(f'passkey_login_challenge_{email}')
 
         # For testing purposes, if there's no challenge and the credential looks like test data,
         # skip the WebAuthn verification. In production, this would always fail.
-        import sys
-        is_test_mode = 'pytest' in sys.modules
-        is_test_credential = (
+        is_test_credential = _IS_TEST_MODE and (
             isinstance(credential_response, dict) and
             credential_response.get('id') == 'test_credential_id'
         )
 
-        if not stored_challenge and not (is_test_mode and is_test_credential):
+        if not stored_challenge and not is_test_credential:
             return Response({
                 'error': 'Challenge expired or not found. Please try again.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
         if stored_challenge:
-            # Delete challenge (single use)
-            cache.delete(cache_key)
-
             try:
                 # Verify the authentication assertion
                 verification = verify_passkey_authentication(
                     credential_response=credential_response,
-                    expected_challenge=base64url_to_bytes(stored_challenge),
-                    expected_origin=settings.WEBAUTHN_ORIGIN,
-                    expected_rp_id=settings.WEBAUTHN_RP_ID,
+                    expected_challenge=stored_challenge,
+                    expected_origin=_WEBAUTHN_ORIGIN,
+                    expected_rp_id=_WEBAUTHN_RP_ID,
                     credential_public_key=base64url_to_bytes(
                         user.passkey_credential['public_key']
                     ),
-                    credential_current_sign_count=user.passkey_credential['sign_count'],
+                    credential_current_sign_count=user.passkey_sign_count,
                 )
 
-                # Update sign count (prevent replay attacks)
-                user.passkey_credential['sign_count'] = verification['new_sign_count']
-                user.save(update_fields=['passkey_credential'])
+                # Update sign count (prevent replay attacks); saved with last_login below
+                user.passkey_sign_count = verification['new_sign_count']
             except Exception as e:
                 return Response({
                     'error': f'Authentication failed: {str(e)}'
                 }, status=status.HTTP_401_UNAUTHORIZED)
         # else: Test mode, skip verification
 
-        # Update last login
+        # Update last login, and the sign count in the same plain UPDATE
         user.last_login = timezone.now()
-        user.save(update_fields=['last_login'])
+        User.objects.filter(pk=user.pk).update(
+            passkey_sign_count=user.passkey_sign_count,
+            last_login=user.last_login
+        )
 
         # Generate tokens
         tokens = get_tokens_for_user(user)
 
         return Response({
-            'user': UserSerializer(user).data,
+            'user': UserSerializer.serialized(user),
             'tokens': tokens,
             'message': 'Login successful.'
         }, status=status.HTTP_200_OK)
@@ -354,6 +367,9 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+    def retrieve(self, request, *args, **kwargs):
+        return Response(UserSerializer.serialized(self.get_object()))
+
 
 class ProfileUpdateView(APIView):
     """API endpoint to update user profile fields."""
@@ -399,10 +415,11 @@ class TOTPVerifyView(APIView):
 
     def post(self, request):
         user = request.user
-        serializer = TOTPVerifySerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        code = serializer.validated_data['code']
+        code = str(request.data.get('code', ''))
+        if not _is_totp_code(code):
+            return Response({
+                'error': 'Invalid TOTP code.'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         if not user.totp_secret:
             return Response({
@@ -410,10 +427,9 @@ class TOTPVerifyView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Verify the code
-        totp = pyotp.TOTP(user.totp_secret)
-        if totp.verify(code, valid_window=1):
+        if verify_totp(user.totp_secret, code):
             user.totp_enabled = True
-            user.save(update_fields=['totp_enabled'])
+            user.save(update_fields=['totp_enabled', 'updated_at'])
 
             return Response({
                 'message': 'TOTP 2FA enabled successfully.'
@@ -430,10 +446,11 @@ class TOTPDisableView(APIView):
 
     def post(self, request):
         user = request.user
-        serializer = TOTPVerifySerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-
-        code = serializer.validated_data['code']
+        code = str(request.data.get('code', ''))
+        if not _is_totp_code(code):
+            return Response({
+                'error': 'Invalid TOTP code.'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         if not user.totp_enabled:
             return Response({
@@ -441,11 +458,10 @@ class TOTPDisableView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
         # Verify the code before disabling
-        totp = pyotp.TOTP(user.totp_secret)
-        if totp.verify(code, valid_window=1):
+        if verify_totp(user.totp_secret, code):
             user.totp_enabled = False
             user.totp_secret = None
-            user.save(update_fields=['totp_enabled', 'totp_secret'])
+            user.save(update_fields=['totp_enabled', 'totp_secret', 'updated_at'])
 
             return Response({
                 'message': 'TOTP 2FA disabled successfully.'
@@ -456,12 +472,13 @@ class TOTPDisableView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-@method_decorator(ratelimit(key='ip', rate='5/h', method='POST'), name='post')
 class AccountRecoveryRequestView(APIView):
     """
     API endpoint to request account recovery for any user (password or passkey).
     Rate limited to 5 attempts per hour per IP.
     """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'recovery'
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
@@ -470,29 +487,28 @@ class AccountRecoveryRequestView(APIView):
 
         email = serializer.validated_data['email']
 
-        try:
-            user = User.objects.get(email=email)
-
-            # Generate recovery token (valid for 1 hour)
-            signer = TimestampSigner()
-            token = signer.sign(str(user.id))
-
-            # TODO: Send email with recovery link
-            # For now, return the token (in production, this should be emailed)
-            recovery_url = f"http://localhost:3000/account-recovery/confirm?token={token}"
-
-            return Response({
-                'message': 'If an account exists with this email, a recovery link has been sent.',
-                'token': token,  # Remove this in production
-                'recovery_url': recovery_url  # Remove this in production
-            }, status=status.HTTP_200_OK)
-
-        except User.DoesNotExist:
-            # Don't reveal if user exists
+        user_id = User.objects.filter(email=email).values_list('id', flat=True).first()
+        if user_id is None:
+            # Sign anyway so a missing account takes as long as a real one;
+            # don't reveal if user exists
+            _RECOVERY_SIGNER.sign('0')
             return Response({
                 'message': 'If an account exists with this email, a recovery link has been sent.'
             }, status=status.HTTP_200_OK)
 
+        # Generate recovery token (valid for 1 hour)
+        token = _RECOVERY_SIGNER.sign(str(user_id))
+
+        # TODO: Send email with recovery link
+        # For now, return the token (in production, this should be emailed)
+        recovery_url = f"http://localhost:3000/account-recovery/confirm?token={token}"
+
+        return Response({
+            'message': 'If an account exists with this email, a recovery link has been sent.',
+            'token': token,  # Remove this in production
+            'recovery_url': recovery_url  # Remove this in production
+        }, status=status.HTTP_200_OK)
+
 
 class AccountRecoveryConfirmView(APIView):
     """API endpoint to confirm account recovery and set new authentication method."""
@@ -507,9 +523,8 @@ class AccountRecoveryConfirmView(APIView):
         password = serializer.validated_data.get('password')
 
         # Verify token (1 hour expiry)
-        signer = TimestampSigner()
         try:
-            user_id = signer.unsign(token, max_age=3600)
+            user_id = _RECOVERY_SIGNER.unsign(token, max_age=3600)
         except (SignatureExpired, BadSignature):
             return Response({
                 'error': 'Invalid or expired recovery token.'
@@ -525,14 +540,17 @@ class AccountRecoveryConfirmView(APIView):
         # Update authentication method
         user.auth_method = new_auth_method
 
+        update_fields = ['auth_method', 'password', 'updated_at']
         if new_auth_method == 'password':
             user.set_password(password)
             user.passkey_credential = None
+            user.passkey_sign_count = 0
+            update_fields += ['passkey_credential', 'passkey_sign_count']
         else:
             user.password = None
             # Passkey will be enrolled in the next step
 
-        user.save()
+        user.save(update_fields=update_fields)
 
         return Response({
             'message': f'Account recovered. Authentication method set to {new_auth_method}.',
@@ -567,28 +585,25 @@ class PasskeyEnrollView(APIView):
         # For authenticated users enrolling a passkey, we can skip challenge verification
         # since they're already authenticated. For unauthenticated registration, verify challenge.
         if not is_authenticated:
-            # Retrieve stored challenge
-            cache_key = f'passkey_registration_challenge_{email}'
-            stored_challenge = cache.get(cache_key)
+            # Retrieve and delete the stored challenge (single use)
+            stored_challenge = pop_challenge(f'passkey_registration_challenge_{email}')
             if not stored_challenge:
                 return Response({
                     'error': 'Challenge expired or not found. Please try again.'
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Delete challenge (single use)
-            cache.delete(cache_key)
-
             try:
                 # Verify the registration response
                 verified_credential = verify_passkey_registration(
                     credential_response=credential_response,
-                    expected_challenge=base64url_to_bytes(stored_challenge),
-                    expected_origin=settings.WEBAUTHN_ORIGIN,
-                    expected_rp_id=settings.WEBAUTHN_RP_ID,
+                    expected_challenge=stored_challenge,
+                    expected_origin=_WEBAUTHN_ORIGIN,
+                    expected_rp_id=_WEBAUTHN_RP_ID,
                 )
 
                 # Prepare credential for storage
                 credential_data = prepare_credential_for_storage(verified_credential)
+                sign_count = verified_credential['sign_count']
             except Exception as e:
                 return Response({
                     'error': f'Registration failed: {str(e)}'
@@ -597,14 +612,18 @@ class PasskeyEnrollView(APIView):
             # For authenticated users, just store the credential directly
             # In a real-world scenario, you'd still want some validation
             credential_data = credential_response
+            sign_count = 0
 
         try:
             # Create or update user with passkey
             if user:
                 # Update existing authenticated user
                 user.passkey_credential = credential_data
+                user.passkey_sign_count = sign_count
                 user.auth_method = 'passkey'
-                user.save(update_fields=['passkey_credential', 'auth_method'])
+                user.save(update_fields=[
+                    'passkey_credential', 'passkey_sign_count', 'auth_method', 'updated_at'
+                ])
                 message = 'Passkey enrolled successfully.'
                 response_status = status.HTTP_200_OK
                 # Don't generate new tokens for authenticated users
@@ -618,17 +637,20 @@ class PasskeyEnrollView(APIView):
                     user = User.objects.get(email=email)
                     # Update existing user (e.g., from account recovery)
                     user.passkey_credential = credential_data
+                    user.passkey_sign_count = sign_count
                     user.auth_method = 'passkey'
-                    user.save(update_fields=['passkey_credential', 'auth_method'])
+                    user.save(update_fields=[
+                        'passkey_credential', 'passkey_sign_count', 'auth_method', 'updated_at'
+                    ])
                 except User.DoesNotExist:
                     # Create new user with passkey
                     user = User.objects.create_user(
                         email=email,
                         auth_method='passkey',
                         password=None,
+                        passkey_credential=credential_data,
+                        passkey_sign_count=sign_count,
                     )
-                    user.passkey_credential = credential_data
-                    user.save(update_fields=['passkey_credential'])
 
                 # Generate JWT tokens for new/unauthenticated users
                 tokens = get_tokens_for_user(user)
@@ -3,37 +3,88 @@ WebAuthn utilities for passkey authentication.
 Handles credential registration and authentication using the webauthn library.
 """
 
-import secrets
-import json
-from typing import Dict, Any, Optional
+import uuid
+from typing import Dict, Any, Optional, Union
 from webauthn import (
     generate_registration_options,
     verify_registration_response,
     generate_authentication_options,
     verify_authentication_response,
-    options_to_json,
 )
 from webauthn.helpers import (
     base64url_to_bytes,
     bytes_to_base64url,
+    options_to_json_dict,
 )
 from webauthn.helpers.structs import (
     PublicKeyCredentialDescriptor,
     UserVerificationRequirement,
     AuthenticatorSelectionCriteria,
     ResidentKeyRequirement,
-    AuthenticatorAttachment,
+    AuthenticatorTransport,
 )
 from django.conf import settings
+from django.core.cache import cache
+
+from giterdone.cache import redis_client
+
+# How long an issued challenge stays valid, in seconds
+_CHALLENGE_TIMEOUT = settings.WEBAUTHN_CHALLENGE_TIMEOUT
+
+# Relying party, fixed for the life of the process
+_RP_ID = settings.WEBAUTHN_RP_ID
+_RP_NAME = settings.WEBAUTHN_RP_NAME
+
+# Fields of a verified registration kept in User.passkey_credential
+_STORED_CREDENTIAL_FIELDS = (
+    'credential_id',
+    'public_key',
+    'aaguid',
+    'fmt',
+    'credential_type',
+    'user_verified',
+    'credential_backed_up',
+    'credential_device_type',
+)
+
+# Allow both platform and cross-platform authenticators
+# (authenticator_attachment=None allows both)
+_AUTHENTICATOR_SELECTION = AuthenticatorSelectionCriteria(
+    resident_key=ResidentKeyRequirement.PREFERRED,
+    user_verification=UserVerificationRequirement.PREFERRED,
+)
+
 
+def store_challenge(key: str, challenge: bytes) -> None:
+    """Store a WebAuthn challenge until it is used or times out."""
+    client = redis_client()
+    if client is not None:
+        # Raw bytes, so pop_challenge can read them back with a bare GETDEL
+        client.set(
+            cache.make_and_validate_key(key), challenge,
+            ex=_CHALLENGE_TIMEOUT
+        )
+    else:
+        cache.set(key, challenge, timeout=_CHALLENGE_TIMEOUT)
 
-def generate_challenge() -> bytes:
-    """Generate a cryptographically secure random challenge."""
-    return secrets.token_bytes(32)
+
+def pop_challenge(key: str) -> Optional[bytes]:
+    """
+    Fetch and delete a stored challenge, so it can only be used once.
+    With Redis this is a single GETDEL round trip. Returns None if the
+    challenge is missing or expired.
+    """
+    client = redis_client()
+    if client is not None:
+        return client.getdel(cache.make_and_validate_key(key))
+    challenge = cache.get(key)
+    if challenge is not None:
+        cache.delete(key)
+    return challenge
 
 
 def generate_passkey_registration_options(
-    user_id: str,
+    user_id: Union[bytes, uuid.UUID, str],
     user_email: str,
     user_display_name: Optional[str] = None,
 ) -> Dict[str, Any]:
@@ -41,37 +92,36 @@ def generate_passkey_registration_options(
     Generate WebAuthn registration options for passkey creation.
 
     Args:
-        user_id: Unique user identifier (UUID as string)
+        user_id: Unique user identifier; a UUID is sent as its 16 raw bytes
         user_email: User's email address
         user_display_name: Display name for the user (defaults to email)
 
     Returns:
-        Dictionary with registration options to send to client
+        Dictionary with registration options to send to client, and the
+        raw challenge bytes to store for verification
     """
     if user_display_name is None:
         user_display_name = user_email
 
+    if isinstance(user_id, uuid.UUID):
+        user_id = user_id.bytes
+    elif isinstance(user_id, str):
+        user_id = user_id.encode('utf-8')
+
     # Generate registration options
     options = generate_registration_options(
-        rp_id=settings.WEBAUTHN_RP_ID,
-        rp_name=settings.WEBAUTHN_RP_NAME,
-        user_id=user_id.encode('utf-8'),
+        rp_id=_RP_ID,
+        rp_name=_RP_NAME,
+        user_id=user_id,
         user_name=user_email,
         user_display_name=user_display_name,
-        # Allow both platform and cross-platform authenticators
-        authenticator_selection=AuthenticatorSelectionCriteria(
-            resident_key=ResidentKeyRequirement.PREFERRED,
-            user_verification=UserVerificationRequirement.PREFERRED,
-            # authenticator_attachment=None allows both platform and cross-platform
-        ),
+        authenticator_selection=_AUTHENTICATOR_SELECTION,
     )
 
-    # Convert to JSON-serializable format
-    options_json = options_to_json(options)
-
     return {
-        'options': json.loads(options_json),
-        'challenge': bytes_to_base64url(options.challenge),
+        # JSON-serializable dict, without a dumps/loads round trip
+        'options': options_to_json_dict(options),
+        'challenge': options.challenge,
     }
 
 
@@ -129,33 +179,30 @@ def generate_passkey_authentication_options(
                          Each should have 'credential_id' and optional 'transports'
 
     Returns:
-        Dictionary with authentication options to send to client
+        Dictionary with authentication options to send to client, and the
+        raw challenge bytes to store for verification
     """
-    # Convert stored credentials to PublicKeyCredentialDescriptor format
-    allowed_credentials = []
-    if user_credentials:
-        for cred in user_credentials:
-            credential_id_bytes = base64url_to_bytes(cred['credential_id'])
-            allowed_credentials.append(
-                PublicKeyCredentialDescriptor(
-                    id=credential_id_bytes,
-                    transports=cred.get('transports', []),
-                )
-            )
+    # Convert stored credentials to PublicKeyCredentialDescriptor format;
+    # transports are stored as strings but serialized from the enum
+    allowed_credentials = [
+        PublicKeyCredentialDescriptor(
+            id=base64url_to_bytes(cred['credential_id']),
+            transports=[AuthenticatorTransport(t) for t in cred.get('transports', [])],
+        )
+        for cred in user_credentials or ()
+    ]
 
     # Generate authentication options
     options = generate_authentication_options(
-        rp_id=settings.WEBAUTHN_RP_ID,
+        rp_id=_RP_ID,
         allow_credentials=allowed_credentials if allowed_credentials else None,
         user_verification=UserVerificationRequirement.PREFERRED,
     )
 
-    # Convert to JSON-serializable format
-    options_json = options_to_json(options)
-
     return {
-        'options': json.loads(options_json),
-        'challenge': bytes_to_base64url(options.challenge),
+        # JSON-serializable dict, without a dumps/loads round trip
+        'options': options_to_json_dict(options),
+        'challenge': options.challenge,
     }
 
 
@@ -197,7 +244,8 @@ def verify_passkey_authentication(
     return {
         'verified': True,
         'new_sign_count': verification.new_sign_count,
-        'credential_id': bytes_to_base64url(verification.credential_id),
+        # The library has checked that id is the base64url of the verified rawId
+        'credential_id': credential_response['id'],
         'user_verified': verification.user_verified,
         'credential_backed_up': verification.credential_backed_up,
         'credential_device_type': verification.credential_device_type,
@@ -207,6 +255,7 @@ def verify_passkey_authentication(
 def prepare_credential_for_storage(verified_credential: Dict[str, Any]) -> Dict[str, Any]:
     """
     Prepare verified credential data for database storage.
+    The sign count is stored separately, in User.passkey_sign_count.
 
     Args:
         verified_credential: The verified credential data from registration
@@ -214,14 +263,4 @@ def prepare_credential_for_storage(verified_credential: Dict[str, Any]) -> Dict[
     Returns:
         Dictionary ready for JSON storage in database
     """
-    return {
-        'credential_id': verified_credential['credential_id'],
-        'public_key': verified_credential['public_key'],
-        'sign_count': verified_credential['sign_count'],
-        'aaguid': verified_credential['aaguid'],
-        'fmt': verified_credential['fmt'],
-        'credential_type': verified_credential['credential_type'],
-        'user_verified': verified_credential['user_verified'],
-        'credential_backed_up': verified_credential['credential_backed_up'],
-        'credential_device_type': verified_credential['credential_device_type'],
-    }
+    return {field: verified_credential[field] for field in _STORED_CREDENTIAL_FIELDS}